@@ -1,7 +1,11 @@
+import io
+import mmap
 import os
 import re
 import shutil
+from functools import lru_cache
 from pathlib import Path
+from typing import AnyStr
 
 # ---------------------------------------------------------------------------- #
 #                                  File Helper                                 #
@@ -73,6 +77,20 @@ def overwrite_file(filepath: Path, content: str):
 # ---------------------------------------------------------------------------- #
 
 
+def file_contains(filepath: Path, needle: bytes) -> bool:
+    """Returns `True` if `needle` occurs in the file. The file is scanned through a read-only
+    memory map, so no decoded copy of the content is created.
+    If the file is not present a `FileNotFoundError` exception is thrown."""
+    with open(filepath, "rb") as file_handler:
+        if os.fstat(file_handler.fileno()).st_size == 0:
+            return needle == b""
+        with mmap.mmap(file_handler.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped.find(needle) != -1
+
+
+# ---------------------------------------------------------------------------- #
+
+
 def replace_in_file(filepath: Path, replacements: list[tuple[str, str]], *, flags: int = 0) -> bool:
     """Replaces text in a file using regex patterns. `filepath` is the file to modify,
     `replacements` is a list of pairs containing a regex pattern and a replacement string.
@@ -102,17 +120,37 @@ def replace_in_file(filepath: Path, replacements: list[tuple[str, str]], *, flag
 # ---------------------------------------------------------------------------- #
 
 
-def prepend_file(filepath: Path, content: str, skip_comments: bool = True):
-    """Prepends the provided content to a file.
-    If `skip_comments` is activated the first comments are ignored.
-    If the file does not exist, this function will throw an `IOError`."""
-    absolute_filepath = filepath.absolute()
-    if not absolute_filepath.is_file():
-        raise FileNotFoundError(f"Unable prepend to file '{filepath}'! File does not exists!")
+@lru_cache(maxsize=None)
+def _multi_sub_pattern(keys: tuple[AnyStr, ...], word_boundary: bool) -> re.Pattern[AnyStr]:
+    # Longest keys first so a key that is a prefix of another never shadows it.
+    ordered = sorted(keys, key=len, reverse=True)
+    if isinstance(keys[0], bytes):
+        alternation = b"|".join(re.escape(key) for key in ordered)
+        return re.compile((rb"\b" if word_boundary else b"") + b"(?:" + alternation + b")")
+    alternation = "|".join(re.escape(key) for key in ordered)
+    return re.compile((r"\b" if word_boundary else "") + f"(?:{alternation})")
+
+
+def multi_sub(
+    text: AnyStr, mapping: dict[AnyStr, AnyStr], *, word_boundary: bool = False
+) -> tuple[AnyStr, int]:
+    """Replaces every occurrence of a (literal) key of `mapping` in `text` with its value in a
+    single scan. With `word_boundary` a key only matches at the start of a word. Works on `str`
+    as well as `bytes`, as long as `text` and `mapping` agree.
+    Returns the new text and the number of replacements. The compiled pattern is cached."""
+    if not mapping:
+        return text, 0
+    pattern = _multi_sub_pattern(tuple(mapping), word_boundary)
+    return pattern.subn(lambda m: mapping[m.group(0)], text)
 
-    old_lines = None
-    with open(absolute_filepath, "r") as file_handler:
-        old_lines = file_handler.readlines()
+
+# ---------------------------------------------------------------------------- #
+
+
+def prepend_text(text: str, content: str, skip_comments: bool = True) -> str:
+    """Returns `text` with the provided content prepended.
+    If `skip_comments` is activated the first comments are ignored."""
+    old_lines = io.StringIO(text).readlines()
 
     inside_of_comment = False
     inside_of_allow_directive = False
@@ -150,9 +188,21 @@ def prepend_file(filepath: Path, content: str, skip_comments: bool = True):
 
     file_comments = "".join(comments)
     file_tail = "".join(old_lines[offset:])
-    file_content = f"{file_comments}\n{content}\n{file_tail}"
+    return f"{file_comments}\n{content}\n{file_tail}"
+
+
+def prepend_file(filepath: Path, content: str, skip_comments: bool = True):
+    """Prepends the provided content to a file.
+    If `skip_comments` is activated the first comments are ignored.
+    If the file does not exist, this function will throw an `IOError`."""
+    absolute_filepath = filepath.absolute()
+    if not absolute_filepath.is_file():
+        raise FileNotFoundError(f"Unable prepend to file '{filepath}'! File does not exists!")
+
+    with open(absolute_filepath, "r") as file_handler:
+        old_text = file_handler.read()
 
-    absolute_filepath.write_text(file_content)
+    absolute_filepath.write_text(prepend_text(old_text, content, skip_comments))
 
 
 # ---------------------------------------------------------------------------- #
@@ -1,24 +1,57 @@
+import fcntl
 import logging
+import os
+import re
+import shutil
 import subprocess
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 
 logger = logging.getLogger("fuzzer")
 
+_FULL_COMMIT_SHA_RE = re.compile(r"[0-9a-fA-F]{40}")
+
 
 class GitException(Exception):
     pass
 
 
-def _run_git(args: list[str], *, cwd: Path | None = None) -> subprocess.CompletedProcess[str]:
+def _run_git(
+    args: list[str],
+    *,
+    cwd: Path | None = None,
+    capture_stdout: bool = False,
+    stream: bool = False,
+) -> subprocess.CompletedProcess[str]:
     cmd = ["git", *args]
     logger.info("run: %s", " ".join(cmd))
-    return subprocess.run(
-        cmd,
-        cwd=cwd,
-        text=True,
-        capture_output=True,
-        check=False,
-    )
+    if stream:
+        # Long-running network commands inherit our stdout/stderr, so git never blocks on
+        # buffered output and the user sees its progress live.
+        proc = subprocess.run(cmd, cwd=cwd, check=False)
+        result: subprocess.CompletedProcess[str] = subprocess.CompletedProcess(
+            proc.args, proc.returncode
+        )
+        if proc.returncode != 0:
+            result.stderr = "(streamed, see stderr above)"
+        return result
+    # Send output to temporary files rather than pipes so a chatty command neither stalls on a
+    # full pipe nor grows in memory. The output is only read back on failure, for the error
+    # message; on success `stdout`/`stderr` stay `None` unless `capture_stdout` asks for it.
+    with tempfile.TemporaryFile() as stdout_f, tempfile.TemporaryFile() as stderr_f:
+        proc = subprocess.run(cmd, cwd=cwd, stdout=stdout_f, stderr=stderr_f, check=False)
+        result = subprocess.CompletedProcess(proc.args, proc.returncode)
+        if proc.returncode != 0:
+            stdout_f.seek(0)
+            stderr_f.seek(0)
+            result.stdout = stdout_f.read().decode(errors="replace")
+            result.stderr = stderr_f.read().decode(errors="replace")
+        elif capture_stdout:
+            stdout_f.seek(0)
+            result.stdout = stdout_f.read().decode(errors="replace")
+    return result
 
 
 def _check_ok(proc: subprocess.CompletedProcess[str], *, msg: str) -> None:
@@ -44,25 +77,90 @@ def is_git_repository(path: Path) -> bool:
     return (path / ".git").exists()
 
 
-def git_clone(repo_url: str, target: Path, branch: str | None = None) -> None:
+def git_clone(
+    repo_url: str,
+    target: Path,
+    branch: str | None = None,
+    *,
+    depth: int | None = None,
+    filter_spec: str | None = None,
+    no_checkout: bool = False,
+    reference: Path | None = None,
+    recurse_submodules: bool = False,
+    jobs: int | None = os.cpu_count(),
+) -> None:
     args = ["clone"]
+    # Opt-in partial clone (e.g. "blob:none"): blobs are then fetched lazily, on checkout, diff
+    # or blame, so later commands need the remote.
+    if filter_spec:
+        args += ["--filter", filter_spec]
+    if no_checkout:
+        args += ["--no-checkout"]
+    if reference is not None:
+        # Borrow objects from a local cache, then copy them so the clone does not depend on it.
+        args += ["--reference-if-able", str(reference), "--dissociate"]
+    if recurse_submodules:
+        args += ["--recurse-submodules"]
+        if jobs:
+            args += [f"--jobs={jobs}"]
     if branch:
         args += ["-b", branch]
+        if depth:
+            args += ["--depth", str(depth), "--single-branch"]
     args += [repo_url, str(target)]
-    proc = _run_git(args)
+    proc = _run_git(args, stream=True)
     _check_ok(proc, msg=f"Unable to clone {repo_url} to {target}")
 
 
 def git_pull(repo_dir: Path) -> None:
-    proc = _run_git(["pull"], cwd=repo_dir)
+    proc = _run_git(["pull"], cwd=repo_dir, stream=True)
     _check_ok(proc, msg=f"Unable to pull {repo_dir}")
 
 
-def git_fetch(repo_dir: Path) -> None:
-    proc = _run_git(["fetch", "origin"], cwd=repo_dir)
+def git_fetch(
+    repo_dir: Path,
+    refspec: str | None = None,
+    *,
+    depth: int | None = None,
+    jobs: int | None = None,
+) -> None:
+    args = ["fetch", "origin"]
+    if refspec:
+        args.append(refspec)
+    if depth:
+        args += ["--depth", str(depth)]
+    if jobs:
+        args += [f"--jobs={jobs}"]
+    proc = _run_git(args, cwd=repo_dir, stream=True)
     _check_ok(proc, msg=f"Unable to fetch origin for {repo_dir}")
 
 
+def git_has_commit(repo_dir: Path, commit: str) -> bool:
+    proc = _run_git(["rev-parse", "--verify", "--quiet", f"{commit}^{{commit}}"], cwd=repo_dir)
+    return proc.returncode == 0
+
+
+def git_current_commit(repo_dir: Path) -> str:
+    proc = _run_git(["rev-parse", "HEAD"], cwd=repo_dir, capture_stdout=True)
+    _check_ok(proc, msg=f"Unable to resolve HEAD of {repo_dir}")
+    return proc.stdout.strip()
+
+
+def git_is_clean(repo_dir: Path) -> bool:
+    """True if the working tree has no modified, staged or untracked (non-ignored) files."""
+    proc = _run_git(["status", "--porcelain"], cwd=repo_dir, capture_stdout=True)
+    _check_ok(proc, msg=f"Unable to get the status of {repo_dir}")
+    return proc.stdout.strip() == ""
+
+
+def git_submodule_update(repo_dir: Path, *, jobs: int | None = os.cpu_count()) -> None:
+    args = ["submodule", "update", "--init", "--recursive"]
+    if jobs:
+        args += [f"--jobs={jobs}"]
+    proc = _run_git(args, cwd=repo_dir)
+    _check_ok(proc, msg=f"Unable to update submodules of {repo_dir}")
+
+
 def git_reset_hard(repo_dir: Path) -> None:
     proc = _run_git(["reset", "--hard", "HEAD"], cwd=repo_dir)
     _check_ok(proc, msg=f"Unable to hard reset {repo_dir}")
@@ -84,13 +182,93 @@ def git_checkout(repo_dir: Path, commit: str) -> None:
     _check_ok(proc, msg=f"Unable to checkout {commit} for {repo_dir}")
 
 
-def git_clone_and_switch(repo_dir: Path, repo_url: str, commit: str = "main") -> None:
-    git_clone(repo_url, repo_dir)
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    # Serialize concurrent installs that share the same cache directory.
+    lock_path = path.with_name(path.name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _is_partial_clone(repo_dir: Path) -> bool:
+    proc = _run_git(
+        ["config", "--get", "remote.origin.promisor"], cwd=repo_dir, capture_stdout=True
+    )
+    return proc.returncode == 0 and proc.stdout.strip() == "true"
+
+
+def _ensure_git_cache(repo_url: str, cache_dir: Path) -> Path:
+    """
+    Create (first use) or refresh a full bare mirror of `repo_url` at `cache_dir`. It has to hold
+    every blob: clones borrow their objects from it, and a blob-less mirror would leave them to
+    download every checked-out blob from the remote anyway.
+    """
+    if (cache_dir / "HEAD").exists() and _is_partial_clone(cache_dir):
+        # Left by an earlier blob-less cache; a fetch would keep it partial.
+        shutil.rmtree(cache_dir)
+    if (cache_dir / "HEAD").exists():
+        proc = _run_git(["fetch", "--prune", "origin"], cwd=cache_dir, stream=True)
+        _check_ok(proc, msg=f"Unable to refresh git cache {cache_dir}")
+    else:
+        proc = _run_git(["clone", "--mirror", repo_url, str(cache_dir)], stream=True)
+        _check_ok(proc, msg=f"Unable to create git cache {cache_dir} for {repo_url}")
+    return cache_dir
+
+
+def git_clone_and_switch(
+    repo_dir: Path,
+    repo_url: str,
+    commit: str = "main",
+    *,
+    cache_dir: Path | None = None,
+    filter_spec: str | None = None,
+    recurse_submodules: bool = False,
+    jobs: int | None = os.cpu_count(),
+) -> None:
+    if cache_dir is None:
+        git_clone(repo_url, repo_dir, filter_spec=filter_spec, no_checkout=True)
+    else:
+        with _locked(cache_dir):
+            try:
+                _ensure_git_cache(repo_url, cache_dir)
+            except GitException as e:
+                # The cache is only an optimization; `--reference-if-able` skips unusable caches.
+                logger.warning("git cache unavailable, cloning without it: %s", e)
+            git_clone(
+                repo_url,
+                repo_dir,
+                filter_spec=filter_spec,
+                no_checkout=True,
+                reference=cache_dir,
+            )
+    # Commits that are not reachable from any branch are not part of the clone; fetch that commit
+    # explicitly (with its history, so the repository stays complete rather than shallow).
+    if _FULL_COMMIT_SHA_RE.fullmatch(commit) and not git_has_commit(repo_dir, commit):
+        git_fetch(repo_dir, commit, jobs=jobs)
     git_checkout(repo_dir, commit)
+    # The clone is made without a checkout, so submodules can only be populated once the target
+    # commit (and with it `.gitmodules`) is in place.
+    if recurse_submodules:
+        git_submodule_update(repo_dir, jobs=jobs)
 
 
-def git_reset_and_switch(repo_dir: Path, commit: str = "main") -> None:
+def git_reset_and_switch(
+    repo_dir: Path,
+    commit: str = "main",
+    *,
+    recurse_submodules: bool = False,
+    jobs: int | None = os.cpu_count(),
+) -> None:
+    # Sequential: this helper is shared by every fuzzer, and a fetch running next to
+    # `reset --hard`/`clean` can collide with them on the repository's lock files.
     git_reset_hard(repo_dir)
     git_clean(repo_dir)
-    git_fetch(repo_dir)
+    git_fetch(repo_dir, jobs=jobs)
     git_checkout(repo_dir, commit)
+    if recurse_submodules:
+        git_submodule_update(repo_dir, jobs=jobs)
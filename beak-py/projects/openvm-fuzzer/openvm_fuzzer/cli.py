@@ -40,7 +40,15 @@ def _install(args: argparse.Namespace) -> int:
     # Then, materialize the snapshot into out/openvm-<commit>/openvm-src.
     dest = (args.out_root / f"openvm-{resolved}" / "openvm-src").expanduser().resolve()
 
-    dest = clone_and_checkout_openvm(dest=dest, commit_or_branch=resolved)
+    dest = clone_and_checkout_openvm(
+        dest=dest,
+        commit_or_branch=resolved,
+        patch_passes=[
+            pass1_infrastructure.__name__,
+            pass2_bypass_checks.__name__,
+            pass3_collection.__name__,
+        ],
+    )
 
     # Now, we have the OpenVM snapshot in `dest`.
     # Then, we modify the OpenVM snapshot to make it suitable for fuzzing.
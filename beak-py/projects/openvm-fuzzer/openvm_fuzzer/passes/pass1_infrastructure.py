@@ -18,22 +18,25 @@ Targets
 
 Commit-dependent behavior
 -------------------------
-- `rewrite_private_stark` chooses a tag based on snapshot commit (regzero/336f/f038),
-  or falls back to heuristics on the Plonky3 rev in Cargo.toml.
+- `rewrite_private_stark` chooses a tag from the Plonky3 rev pinned in Cargo.toml, or falls
+  back to the snapshot commit (regzero/336f/f038) when that rev is not known.
 """
 
 from __future__ import annotations
 
 import re
+from functools import lru_cache, partial
 from pathlib import Path
 
+from openvm_fuzzer.passes.sentinel import skip_if_done
+from openvm_fuzzer.passes.steps import PassStep, run_steps
 from openvm_fuzzer.settings import (
     OPENVM_BENCHMARK_336F_COMMIT,
     OPENVM_BENCHMARK_F038_COMMIT,
     OPENVM_BENCHMARK_REGZERO_COMMIT,
     resolve_openvm_commit,
 )
-from zkvm_fuzzer_utils.file import create_file, replace_in_file
+from zkvm_fuzzer_utils.file import create_file, file_contains, multi_sub
 
 # --- rewrite_private_stark.py (merged) ---
 
@@ -50,37 +53,37 @@ _STARK_BACKEND_TAG_BY_COMMIT = {
 }
 
 
+_PLONKY3_REV_RE = re.compile(r'Plonky3\.git", rev = "([0-9a-f]+)"')
+_STARK_BACKEND_DEP_RE = re.compile(
+    r'(openvm-stark-(?:backend|sdk) = \{[^\n]*?)(?:rev|tag) = "[^"]+"'
+)
+
+
 def _resolve_stark_backend_tag(contents: str, commit_or_branch: str) -> str:
+    # The pinned Plonky3 rev identifies the stark-backend release directly; the commit table is
+    # only consulted for manifests whose rev is not known.
+    match = _PLONKY3_REV_RE.search(contents)
+    if match and match.group(1) in _PLONKY3_TAG_BY_REV:
+        return _PLONKY3_TAG_BY_REV[match.group(1)]
+
     resolved_commit = resolve_openvm_commit(commit_or_branch)
     if resolved_commit in _STARK_BACKEND_TAG_BY_COMMIT:
         return _STARK_BACKEND_TAG_BY_COMMIT[resolved_commit]
 
-    match = re.search(r'Plonky3\\.git", rev = "([0-9a-f]+)"', contents)
-    if match:
-        plonky3_rev = match.group(1)
-        if plonky3_rev in _PLONKY3_TAG_BY_REV:
-            return _PLONKY3_TAG_BY_REV[plonky3_rev]
-
     return "v1.0.0-rc.2"
 
 
 def _rewrite_private_stark_backend(*, openvm_install_path: Path, commit_or_branch: str) -> None:
     cargo_toml = openvm_install_path / "Cargo.toml"
-    if not cargo_toml.exists():
+    if not cargo_toml.exists() or not file_contains(cargo_toml, b"stark-backend-private"):
         return
     contents = cargo_toml.read_text()
-    if "stark-backend-private" not in contents:
-        return
     tag = _resolve_stark_backend_tag(contents, commit_or_branch)
     contents = contents.replace(
         "ssh://git@github.com/axiom-crypto/stark-backend-private.git",
         "https://github.com/openvm-org/stark-backend.git",
     )
-    contents = re.sub(
-        r"(openvm-stark-(?:backend|sdk) = \\{[^\\n]*?)(?:rev|tag) = \"[^\"]+\"",
-        rf'\\1tag = "{tag}"',
-        contents,
-    )
+    contents = _STARK_BACKEND_DEP_RE.sub(rf'\1tag = "{tag}"', contents)
     cargo_toml.write_text(contents)
 
 
@@ -90,6 +93,7 @@ def _rewrite_private_stark_backend(*, openvm_install_path: Path, commit_or_branc
 _FUZZER_UTILS_TEMPLATE_DIR = Path(__file__).resolve().parents[1] / "fuzzer_utils_crate"
 
 
+@lru_cache(maxsize=None)
 def _read_fuzzer_utils_template(filename: str) -> str:
     return (_FUZZER_UTILS_TEMPLATE_DIR / filename).read_text()
 
@@ -114,23 +118,21 @@ def _add_fuzzer_utils_to_workspace(*, openvm_install_path: Path) -> None:
     root_cargo = openvm_install_path / "Cargo.toml"
     if not root_cargo.exists():
         return
+    if file_contains(root_cargo, b'"crates/fuzzer_utils"') and file_contains(
+        root_cargo, b'fuzzer_utils = { path = "crates/fuzzer_utils" }'
+    ):
+        return
     root_contents = root_cargo.read_text()
+    edits: dict[str, str] = {}
     if '"crates/fuzzer_utils"' not in root_contents:
-        replace_in_file(
-            root_cargo,
-            [(r"members = \[", 'members = [\n    "crates/fuzzer_utils",')],
-        )
-    root_contents = root_cargo.read_text()
+        edits["members = ["] = 'members = [\n    "crates/fuzzer_utils",'
     if 'fuzzer_utils = { path = "crates/fuzzer_utils" }' not in root_contents:
-        replace_in_file(
-            root_cargo,
-            [
-                (
-                    r"\[workspace\.dependencies\]",
-                    '[workspace.dependencies]\nfuzzer_utils = { path = "crates/fuzzer_utils" }',
-                )
-            ],
+        edits["[workspace.dependencies]"] = (
+            '[workspace.dependencies]\nfuzzer_utils = { path = "crates/fuzzer_utils" }'
         )
+    new_contents, n = multi_sub(root_contents, edits)
+    if n:
+        root_cargo.write_text(new_contents)
 
 
 # --- vm_add_serde_json.py (merged) ---
@@ -140,20 +142,14 @@ def _vm_add_serde_json_dep(*, openvm_install_path: Path) -> None:
     # Ensure OpenVM circuit crate can serialize per-instruction records.
     # (serde_json is provided in the OpenVM workspace dependencies.)
     vm_cargo_toml = openvm_install_path / "crates" / "vm" / "Cargo.toml"
-    if not vm_cargo_toml.exists():
+    if not vm_cargo_toml.exists() or file_contains(vm_cargo_toml, b"serde_json.workspace = true"):
         return
     vm_contents = vm_cargo_toml.read_text()
-    if "serde_json.workspace = true" in vm_contents:
-        return
-    replace_in_file(
-        vm_cargo_toml,
-        [
-            (
-                r"\[dependencies\]",
-                "[dependencies]\nserde_json.workspace = true",
-            )
-        ],
+    new_contents, n = multi_sub(
+        vm_contents, {"[dependencies]": "[dependencies]\nserde_json.workspace = true"}
     )
+    if n:
+        vm_cargo_toml.write_text(new_contents)
 
 
 # --- rv32im_circuit_add_deps.py (merged) ---
@@ -163,18 +159,20 @@ def _rv32im_circuit_add_deps(*, openvm_install_path: Path) -> None:
     rv32im_cargo = openvm_install_path / "extensions" / "rv32im" / "circuit" / "Cargo.toml"
     if not rv32im_cargo.exists():
         return
+    if file_contains(rv32im_cargo, b"fuzzer_utils.workspace = true") and file_contains(
+        rv32im_cargo, b"serde_json.workspace = true"
+    ):
+        return
     rv32im_contents = rv32im_cargo.read_text()
+    # Each dependency is inserted right below the header, so the last one added comes first.
+    deps = ""
     if "fuzzer_utils.workspace = true" not in rv32im_contents:
-        replace_in_file(
-            rv32im_cargo,
-            [(r"\[dependencies\]", "[dependencies]\nfuzzer_utils.workspace = true")],
-        )
-    rv32im_contents = rv32im_cargo.read_text()
+        deps = "\nfuzzer_utils.workspace = true" + deps
     if "serde_json.workspace = true" not in rv32im_contents:
-        replace_in_file(
-            rv32im_cargo,
-            [(r"\[dependencies\]", "[dependencies]\nserde_json.workspace = true")],
-        )
+        deps = "\nserde_json.workspace = true" + deps
+    new_contents, n = multi_sub(rv32im_contents, {"[dependencies]": "[dependencies]" + deps})
+    if n:
+        rv32im_cargo.write_text(new_contents)
 
 
 def _patch_instructions_opcode_serde(*, openvm_install_path: Path) -> None:
@@ -200,14 +198,38 @@ def _patch_instructions_opcode_serde(*, openvm_install_path: Path) -> None:
     instructions_rs.write_text(contents)
 
 
+@skip_if_done
 def apply(*, openvm_install_path: Path, commit_or_branch: str) -> None:
-    _rewrite_private_stark_backend(
-        openvm_install_path=openvm_install_path,
-        commit_or_branch=commit_or_branch,
+    # Steps touching disjoint files run concurrently; the two root Cargo.toml writers stay ordered.
+    run_steps(
+        [
+            PassStep(
+                partial(
+                    _rewrite_private_stark_backend,
+                    openvm_install_path=openvm_install_path,
+                    commit_or_branch=commit_or_branch,
+                ),
+                touches=("Cargo.toml",),
+            ),
+            PassStep(
+                partial(_create_fuzzer_utils_crate, openvm_install_path=openvm_install_path),
+                touches=("crates/fuzzer_utils",),
+            ),
+            PassStep(
+                partial(_add_fuzzer_utils_to_workspace, openvm_install_path=openvm_install_path),
+                touches=("Cargo.toml",),
+            ),
+            PassStep(
+                partial(_vm_add_serde_json_dep, openvm_install_path=openvm_install_path),
+                touches=("crates/vm/Cargo.toml",),
+            ),
+            PassStep(
+                partial(_rv32im_circuit_add_deps, openvm_install_path=openvm_install_path),
+                touches=("extensions/rv32im/circuit/Cargo.toml",),
+            ),
+            PassStep(
+                partial(_patch_instructions_opcode_serde, openvm_install_path=openvm_install_path),
+                touches=("extensions/rv32im/transpiler/src/instructions.rs",),
+            ),
+        ]
     )
-    _create_fuzzer_utils_crate(openvm_install_path=openvm_install_path)
-    _add_fuzzer_utils_to_workspace(openvm_install_path=openvm_install_path)
-    _vm_add_serde_json_dep(openvm_install_path=openvm_install_path)
-    _rv32im_circuit_add_deps(openvm_install_path=openvm_install_path)
-    _patch_instructions_opcode_serde(openvm_install_path=openvm_install_path)
-
@@ -26,9 +26,13 @@ None (these are structural patches applied uniformly when files exist).
 
 from __future__ import annotations
 
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
-from zkvm_fuzzer_utils.file import prepend_file, replace_in_file
+from openvm_fuzzer.passes.sentinel import skip_if_done
+from zkvm_fuzzer_utils.file import file_contains, multi_sub, prepend_text
 
 
 # --- transpiler_remove_protection.py (merged) ---
@@ -111,74 +115,132 @@ def _transpiler_remove_protection(openvm_install_path: Path) -> None:
 
 # --- vm_replace_asserts.py (merged) ---
 
-
-def _vm_replace_asserts_and_add_fuzzer_utils_dep(*, openvm_install_path: Path) -> None:
-    # Recursively remove asserts in the whole vm folder, and ensure fuzzer_utils dependency.
-    working_dirs = [openvm_install_path / "crates" / "vm"]
-    while len(working_dirs) > 0:
-        working_dir = working_dirs.pop()
-        if not working_dir.exists():
+_FUZZER_UTILS_PREFIX = "#[allow(unused_imports)]\nuse fuzzer_utils;\n"
+_FUZZER_UTILS_PREFIX_BYTES = _FUZZER_UTILS_PREFIX.encode()
+
+# Assert macro -> fuzzer_utils macro. Each table is applied with `multi_sub`, so a file is scanned
+# once no matter how many macros are rewritten. The tokens are ASCII, so the rewrite works on raw
+# bytes and sources are never decoded unless they need the `use fuzzer_utils;` prefix.
+_VM_ASSERT_MACROS: dict[bytes, bytes] = {
+    b"assert!": b"fuzzer_utils::fuzzer_assert!",
+    b"assert_eq!": b"fuzzer_utils::fuzzer_assert_eq!",
+    b"assert_ne!": b"fuzzer_utils::fuzzer_assert_ne!",
+    b"debug_assert!": b"fuzzer_utils::fuzzer_assert!",
+    b"debug_assert_eq!": b"fuzzer_utils::fuzzer_assert_eq!",
+}
+
+_RV32IM_ASSERT_MACROS: dict[bytes, bytes] = {
+    b"assert!": b"fuzzer_utils::fuzzer_assert!",
+    b"assert_eq!": b"fuzzer_utils::fuzzer_assert_eq!",
+    b"debug_assert!": b"fuzzer_utils::fuzzer_assert!",
+    b"debug_assert_eq!": b"fuzzer_utils::fuzzer_assert_eq!",
+}
+
+# Every macro above contains this token, so a file without it can be skipped without reading it.
+_ASSERT_NEEDLE = b"assert"
+
+# Files per worker task. Within a task, file I/O is overlapped with the rewrites.
+_REWRITE_BATCH_SIZE = 32
+
+
+def _rewrite_content(content: bytes, macros: dict[bytes, bytes]) -> bytes | None:
+    """Rewrite every macro in `macros` to its replacement in a single pass and add the
+    `use fuzzer_utils;` prefix. Returns `None` if nothing was rewritten."""
+    new_content, n = multi_sub(content, macros, word_boundary=True)
+    if n == 0:
+        return None
+    if not new_content.startswith(_FUZZER_UTILS_PREFIX_BYTES):
+        new_content = prepend_text(new_content.decode(), _FUZZER_UTILS_PREFIX).encode()
+    return new_content
+
+
+def _read_if_candidate(path: Path) -> bytes | None:
+    # Most sources have no asserts at all; an mmap scan rules them out without copying the file.
+    if not file_contains(path, _ASSERT_NEEDLE):
+        return None
+    return path.read_bytes()
+
+
+def _rewrite_batch(paths: list[Path], macros: dict[bytes, bytes]) -> None:
+    """Rewrite `paths` in order, reading the next file and writing finished ones on I/O threads
+    (file I/O releases the GIL) while the current file is rewritten.
+
+    Must stay a module-level function without shared state so it can run in a worker process.
+    """
+    with ThreadPoolExecutor(max_workers=2) as io_pool:
+        writes = []
+        pending_read = io_pool.submit(_read_if_candidate, paths[0])
+        for i, path in enumerate(paths):
+            content = pending_read.result()
+            if i + 1 < len(paths):
+                pending_read = io_pool.submit(_read_if_candidate, paths[i + 1])
+            if content is None:
+                continue
+            new_content = _rewrite_content(content, macros)
+            if new_content is not None:
+                writes.append(io_pool.submit(path.write_bytes, new_content))
+        for write in writes:
+            write.result()
+
+
+def _rewrite_files(paths: list[Path], macros: dict[bytes, bytes]) -> None:
+    # Files are independent, so fan batches of them out over a process pool.
+    if not paths:
+        return
+    batches = [
+        paths[i : i + _REWRITE_BATCH_SIZE] for i in range(0, len(paths), _REWRITE_BATCH_SIZE)
+    ]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        # Drain the iterator so worker exceptions are raised here.
+        for _ in executor.map(_rewrite_batch, batches, repeat(macros)):
+            pass
+
+
+def _collect_sources(root: Path) -> tuple[list[Path], list[Path]]:
+    """Walk `root` once and return its `Cargo.toml` manifests and `.rs` files."""
+    cargo_tomls: list[Path] = []
+    rs_files: list[Path] = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename == "Cargo.toml":
+                cargo_tomls.append(Path(dirpath, filename))
+            elif filename.endswith(".rs"):
+                rs_files.append(Path(dirpath, filename))
+    return cargo_tomls, rs_files
+
+
+def _vm_replace_asserts_and_add_fuzzer_utils_dep(
+    cargo_tomls: list[Path], rs_files: list[Path]
+) -> None:
+    # Remove asserts in the whole vm folder, and ensure fuzzer_utils dependency.
+    # Manifests are edited here, before the fan-out, to keep writes single-threaded.
+    for cargo_toml in cargo_tomls:
+        if file_contains(cargo_toml, b"fuzzer_utils.workspace = true"):
             continue
-        for elem in working_dir.iterdir():
-            if elem.is_dir():
-                working_dirs.append(elem)
-            if elem.is_file() and elem.name == "Cargo.toml":
-                contents = elem.read_text()
-                if "fuzzer_utils.workspace = true" not in contents:
-                    replace_in_file(
-                        elem,
-                        [(r"\[dependencies\]", "[dependencies]\nfuzzer_utils.workspace = true")],
-                    )
-            if elem.is_file() and elem.suffix == ".rs":
-                # NOTE: the order matters here because the replacement is done iteratively
-                is_updated = replace_in_file(
-                    elem,
-                    [
-                        (r"\bassert!", "fuzzer_utils::fuzzer_assert!"),
-                        (r"\bassert_eq!", "fuzzer_utils::fuzzer_assert_eq!"),
-                        (r"\bassert_ne!", "fuzzer_utils::fuzzer_assert_ne!"),
-                        (r"\bdebug_assert!", "fuzzer_utils::fuzzer_assert!"),
-                        (r"\bdebug_assert_eq!", "fuzzer_utils::fuzzer_assert_eq!"),
-                    ],
-                )
-                if is_updated:
-                    prefix = "#[allow(unused_imports)]\nuse fuzzer_utils;\n"
-                    if not elem.read_text().startswith(prefix):
-                        prepend_file(elem, prefix)
+        contents = cargo_toml.read_text()
+        new_contents, n = multi_sub(
+            contents, {"[dependencies]": "[dependencies]\nfuzzer_utils.workspace = true"}
+        )
+        if n:
+            cargo_toml.write_text(new_contents)
+    _rewrite_files(rs_files, _VM_ASSERT_MACROS)
 
 
 # --- rv32im_replace_asserts.py (merged) ---
 
 
-def _rv32im_replace_asserts(*, openvm_install_path: Path) -> None:
-    # Recursively remove asserts in the whole rv32im circuit folder
-    working_dirs = [openvm_install_path / "extensions" / "rv32im" / "circuit" / "src"]
-    while len(working_dirs) > 0:
-        working_dir = working_dirs.pop()
-        if not working_dir.exists():
-            continue
-        for elem in working_dir.iterdir():
-            if elem.is_dir():
-                working_dirs.append(elem)
-            if elem.is_file() and elem.suffix == ".rs":
-                # NOTE: the order matters here because the replacement is done iteratively
-                is_updated = replace_in_file(
-                    elem,
-                    [
-                        (r"\bassert!", "fuzzer_utils::fuzzer_assert!"),
-                        (r"\bassert_eq!", "fuzzer_utils::fuzzer_assert_eq!"),
-                        (r"\bdebug_assert!", "fuzzer_utils::fuzzer_assert!"),
-                        (r"\bdebug_assert_eq!", "fuzzer_utils::fuzzer_assert_eq!"),
-                    ],
-                )
-                if is_updated:
-                    prefix = "#[allow(unused_imports)]\nuse fuzzer_utils;\n"
-                    if not elem.read_text().startswith(prefix):
-                        prepend_file(elem, prefix)
+def _rv32im_replace_asserts(rs_files: list[Path]) -> None:
+    # Remove asserts in the whole rv32im circuit folder
+    _rewrite_files(rs_files, _RV32IM_ASSERT_MACROS)
 
 
+@skip_if_done
 def apply(*, openvm_install_path: Path, commit_or_branch: str) -> None:
     _transpiler_remove_protection(openvm_install_path)
-    _vm_replace_asserts_and_add_fuzzer_utils_dep(openvm_install_path=openvm_install_path)
-    _rv32im_replace_asserts(openvm_install_path=openvm_install_path)
-
+    # Each tree is walked exactly once; the helpers only get the file lists.
+    vm_cargo_tomls, vm_rs_files = _collect_sources(openvm_install_path / "crates" / "vm")
+    _, rv32im_rs_files = _collect_sources(
+        openvm_install_path / "extensions" / "rv32im" / "circuit" / "src"
+    )
+    _vm_replace_asserts_and_add_fuzzer_utils_dep(vm_cargo_tomls, vm_rs_files)
+    _rv32im_replace_asserts(rv32im_rs_files)
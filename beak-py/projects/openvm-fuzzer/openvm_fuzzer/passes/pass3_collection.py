@@ -4,10 +4,19 @@ Pass 3: Trace + Micro-op Collection Instrumentation
 
 from __future__ import annotations
 
+import json
 import logging
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from itertools import groupby
 from pathlib import Path
+from typing import AnyStr, Iterable, Literal
 
+from openvm_fuzzer.passes.sentinel import SENTINEL_DIR, skip_if_done
 from openvm_fuzzer.settings import (
     OPENVM_BENCHMARK_336F_COMMIT,
     OPENVM_BENCHMARK_F038_COMMIT,
@@ -22,91 +31,444 @@ logger = logging.getLogger("fuzzer")
 # --- Utility functions ---
 
 
-def _insert_after(contents: str, *, anchor: str, insert: str, guard: str) -> str:
-    if guard in contents:
-        return contents
+def _anchor_pos(contents: AnyStr, anchor: AnyStr, *, after: bool) -> int:
     idx = contents.find(anchor)
     if idx < 0:
         raise RuntimeError(f"anchor not found for injection: {anchor!r}")
-    pos = idx + len(anchor)
-    return contents[:pos] + insert + contents[pos:]
+    return idx + len(anchor) if after else idx
 
 
-def _insert_before(contents: str, *, anchor: str, insert: str, guard: str) -> str:
+def _insert_after(contents: str, *, anchor: str, insert: str, guard: str) -> str:
     if guard in contents:
         return contents
-    idx = contents.find(anchor)
-    if idx < 0:
-        raise RuntimeError(f"anchor not found for injection: {anchor!r}")
-    return contents[:idx] + insert + contents[idx:]
+    pos = _anchor_pos(contents, anchor, after=True)
+    return contents[:pos] + insert + contents[pos:]
 
 
-def _insert_before_fn_close(contents: str, *, fn_name: str, insert: str, guard: str) -> str:
+def _insert_before(contents: str, *, anchor: str, insert: str, guard: str) -> str:
     if guard in contents:
         return contents
+    pos = _anchor_pos(contents, anchor, after=False)
+    return contents[:pos] + insert + contents[pos:]
+
+
+# Braces plus the Rust tokens that may contain braces without opening/closing a block: line and
+# block comments, (raw/byte) string literals and char literals. Char literals are matched strictly
+# (one char or one escape) so lifetimes like `'a` are not mistaken for them.
+_RUST_BRACE_TOKEN_RE = re.compile(
+    r"//[^\n]*"
+    r"|/\*[\s\S]*?\*/"
+    r'|b?r(#*)"[\s\S]*?"\1'
+    r'|"(?:\\[\s\S]|[^"\\])*"'
+    r"|'(?:[^'\\\n]|\\(?:x[0-9a-fA-F]{2}|u\{[0-9a-fA-F]{1,6}\}|[^\n]))'"
+    r"|(?P<open>\{)|(?P<close>\})"
+)
+_RUST_BRACE_TOKEN_RE_BYTES = re.compile(_RUST_BRACE_TOKEN_RE.pattern.encode())
+
+
+def _fn_close_pos(contents: AnyStr, fn_name: str) -> int:
+    """Position of the closing brace of the first `fn <fn_name>` body (`str` or `bytes`)."""
     needle = f"fn {fn_name}"
-    start = contents.find(needle)
+    if isinstance(contents, bytes):
+        start = contents.find(_encoded(needle))
+        brace, token_re = b"{", _RUST_BRACE_TOKEN_RE_BYTES
+    else:
+        start = contents.find(needle)
+        brace, token_re = "{", _RUST_BRACE_TOKEN_RE
     if start < 0:
         raise RuntimeError(f"function not found for injection: {needle!r}")
-    brace_open = contents.find("{", start)
+    brace_open = contents.find(brace, start)
     if brace_open < 0:
         raise RuntimeError(f"function body not found for injection: {needle!r}")
     depth = 0
-    for i in range(brace_open, len(contents)):
-        ch = contents[i]
-        if ch == "{":
+    for m in token_re.finditer(contents, brace_open):
+        if m.lastgroup == "open":
             depth += 1
-        elif ch == "}":
+        elif m.lastgroup == "close":
             depth -= 1
             if depth == 0:
-                return contents[:i] + insert + contents[i:]
+                return m.start()
     raise RuntimeError(f"unterminated function body for injection: {needle!r}")
 
 
+def _insert_before_fn_close(contents: str, *, fn_name: str, insert: str, guard: str) -> str:
+    if guard in contents:
+        return contents
+    i = _fn_close_pos(contents, fn_name)
+    return contents[:i] + insert + contents[i:]
+
+
+@lru_cache(maxsize=None)
+def _encoded(s: str) -> bytes:
+    # Anchors, guards and blocks are module constants, so each is encoded once.
+    return s.encode()
+
+
+@lru_cache(maxsize=None)
+def _literal_alternation(needles: tuple[bytes, ...]) -> re.Pattern[bytes]:
+    return re.compile(b"|".join(re.escape(n) for n in sorted(needles, key=len, reverse=True)))
+
+
+def _find_first_each(contents: bytes, needles: tuple[bytes, ...]) -> dict[bytes, int]:
+    """Offset of the first occurrence of each needle, found in one left-to-right scan.
+
+    Needles absent from `contents` are missing from the result. The needles must not overlap one
+    another (anchors and guards are distinct source lines), since matches never overlap.
+    """
+    found: dict[bytes, int] = {}
+    for m in _literal_alternation(needles).finditer(contents):
+        found.setdefault(m.group(), m.start())
+        if len(found) == len(needles):
+            break
+    return found
+
+
+def _add_use_fuzzer_utils(c: bytes) -> bytes:
+    if b"use fuzzer_utils;" in c:
+        return c
+    header_end = c.find(b"\n\n")
+    if header_end > 0:
+        c = c[:header_end] + b"\n#[allow(unused_imports)]\nuse fuzzer_utils;\n" + c[header_end:]
+    return c
+
+
+def _add_import_after_fuzzer_utils(c: bytes, import_line: str) -> bytes:
+    line = _encoded(import_line)
+    if line in c:
+        return c
+    c = _add_use_fuzzer_utils(c)
+    idx = c.find(b"use fuzzer_utils;")
+    if idx < 0:
+        return c
+    line_end = c.find(b"\n", idx)
+    pos = line_end + 1 if line_end >= 0 else len(c)
+    return c[:pos] + line + b"\n" + c[pos:]
+
+
+class _GuardManifest:
+    """Guards (and imports) already applied to each file, kept in `.beak/pass3_guards.json`.
+
+    An entry only counts while the file's size and mtime still match what was recorded after the
+    last write, so a file that was reset or edited since is scanned again. With every guard of a
+    patch recorded, the `_FileEditor` never reads the file.
+    """
+
+    def __init__(self, openvm_install_path: Path) -> None:
+        self._root = openvm_install_path
+        self._file = openvm_install_path / SENTINEL_DIR / "pass3_guards.json"
+        self._lock = threading.Lock()
+        self._changed = False
+        try:
+            self._entries: dict[str, dict] = json.loads(self._file.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+        self._valid: dict[str, set[str]] = {}
+
+    @staticmethod
+    def _stat(path: Path) -> list[int]:
+        st = path.stat()
+        return [st.st_mtime_ns, st.st_size]
+
+    def _guards_for(self, path: Path) -> set[str]:
+        key = path.relative_to(self._root).as_posix()
+        if key not in self._valid:
+            entry = self._entries.get(key)
+            fresh = entry is not None and path.exists() and entry["stat"] == self._stat(path)
+            self._valid[key] = set(entry["guards"]) if fresh else set()
+        return self._valid[key]
+
+    def has(self, path: Path, guard: str) -> bool:
+        with self._lock:
+            return guard in self._guards_for(path)
+
+    def add(self, path: Path, guards: list[str]) -> None:
+        with self._lock:
+            applied = self._guards_for(path)
+            applied.update(guards)
+            key = path.relative_to(self._root).as_posix()
+            self._entries[key] = {"stat": self._stat(path), "guards": sorted(applied)}
+            self._changed = True
+
+    def save(self) -> None:
+        if not self._changed:
+            return
+        self._file.parent.mkdir(parents=True, exist_ok=True)
+        self._file.write_text(json.dumps(self._entries, separators=(",", ":")))
+        self._changed = False
+
+
+class _FileEditor:
+    """Reads a source file once, applies edits to the in-memory content and writes it back once.
+
+    The content is kept as raw bytes (the sources and all patches are ASCII-oriented), so scans
+    run on `bytes.find` and files are never decoded. Inserts are staged as `(position, block)`
+    edits against the current content and materialized in a single join when the content is
+    needed next (or on `flush`), so a chain of inserts copies a large file once, not per insert.
+    With a `_GuardManifest`, edits already recorded for the file are skipped, and the file is
+    only read once an edit actually needs its content.
+    """
+
+    def __init__(self, path: Path, guards: _GuardManifest | None = None) -> None:
+        self.path = path
+        self._guards = guards
+        self._loaded: bytes | None = None
+        # (sort key, insert). The key keeps the order sequential inserts would have produced at the
+        # same position: a later insert-after lands before earlier ones, a later insert-before
+        # after them, and insert-afters precede insert-befores.
+        self._pending: list[tuple[tuple[int, int, int], bytes]] = []
+        # Guards of edits that are in place, recorded in the manifest on `flush`.
+        self._applied: list[str] = []
+        self.dirty = False
+
+    def _base(self) -> bytes:
+        if self._loaded is None:
+            self._loaded = self.path.read_bytes()
+        return self._loaded
+
+    @property
+    def content(self) -> bytes:
+        if self._pending:
+            self._pending.sort(key=lambda edit: edit[0])
+            base = self._base()
+            parts: list[bytes] = []
+            cursor = 0
+            for (pos, _, _), insert in self._pending:
+                parts.append(base[cursor:pos])
+                parts.append(insert)
+                cursor = pos
+            parts.append(base[cursor:])
+            self._loaded = b"".join(parts)
+            self._pending.clear()
+        return self._base()
+
+    def _update(self, content: bytes) -> None:
+        if content != self.content:
+            self._loaded = content
+            self.dirty = True
+
+    def _recorded(self, guard: str) -> bool:
+        return self._guards is not None and self._guards.has(self.path, guard)
+
+    def _is_guarded(self, guard: str) -> bool:
+        guard_b = _encoded(guard)
+        return guard_b in self._base() or any(guard_b in insert for _, insert in self._pending)
+
+    def _stage(self, pos: int, *, after: bool, insert: str) -> None:
+        seq = len(self._pending)
+        key = (pos, 0, -seq) if after else (pos, 1, seq)
+        self._pending.append((key, _encoded(insert)))
+        self.dirty = True
+
+    def ensure_use_fuzzer_utils(self) -> None:
+        guard = "use fuzzer_utils;"
+        if self._recorded(guard):
+            return
+        self._update(_add_use_fuzzer_utils(self.content))
+        if _encoded(guard) in self._base():
+            self._applied.append(guard)
+
+    def ensure_import(self, import_line: str) -> None:
+        if self._recorded(import_line):
+            return
+        self._update(_add_import_after_fuzzer_utils(self.content, import_line))
+        if _encoded(import_line) in self._base():
+            self._applied.append(import_line)
+
+    def insert_after(self, *, anchor: str, insert: str, guard: str) -> None:
+        if self._recorded(guard):
+            return
+        if not self._is_guarded(guard):
+            pos = _anchor_pos(self._base(), _encoded(anchor), after=True)
+            self._stage(pos, after=True, insert=insert)
+        self._applied.append(guard)
+
+    def insert_after_each(self, edits: list[tuple[str, str, str]]) -> None:
+        """`insert_after` for several `(anchor, guard, insert)` edits, with every anchor and guard
+        located in a single scan of the content instead of one scan per lookup."""
+        edits = [edit for edit in edits if not self._recorded(edit[1])]
+        if not edits:
+            return
+        base = self._base()
+        needles = tuple(
+            dict.fromkeys(_encoded(s) for anchor, guard, _ in edits for s in (anchor, guard))
+        )
+        found = _find_first_each(base, needles)
+        for anchor, guard, insert in edits:
+            guard_b = _encoded(guard)
+            if guard_b not in found and not any(guard_b in block for _, block in self._pending):
+                anchor_b = _encoded(anchor)
+                if anchor_b not in found:
+                    raise RuntimeError(f"anchor not found for injection: {anchor!r}")
+                self._stage(found[anchor_b] + len(anchor_b), after=True, insert=insert)
+            self._applied.append(guard)
+
+    def insert_after_all(self, *, anchor: str, insert: str, guard: str) -> None:
+        """`insert_after` at every occurrence of `anchor`, not just the first."""
+        if self._recorded(guard):
+            return
+        if not self._is_guarded(guard):
+            base = self._base()
+            anchor_b = _encoded(anchor)
+            pos = _anchor_pos(base, anchor_b, after=True)
+            while pos >= 0:
+                self._stage(pos, after=True, insert=insert)
+                idx = base.find(anchor_b, pos)
+                pos = idx + len(anchor_b) if idx >= 0 else -1
+        self._applied.append(guard)
+
+    def insert_before(self, *, anchor: str, insert: str, guard: str) -> None:
+        if self._recorded(guard):
+            return
+        if not self._is_guarded(guard):
+            pos = _anchor_pos(self._base(), _encoded(anchor), after=False)
+            self._stage(pos, after=False, insert=insert)
+        self._applied.append(guard)
+
+    def insert_before_fn_close(self, *, fn_name: str, insert: str, guard: str) -> None:
+        if self._recorded(guard):
+            return
+        if not self._is_guarded(guard):
+            self._stage(_fn_close_pos(self.content, fn_name), after=False, insert=insert)
+        self._applied.append(guard)
+
+    def flush(self) -> None:
+        if self.dirty:
+            self.path.write_bytes(self.content)
+            self.dirty = False
+        if self._guards is not None and self._applied:
+            self._guards.add(self.path, self._applied)
+            self._applied = []
+
+
 def _ensure_use_fuzzer_utils(path: Path) -> None:
     if not path.exists():
         return
-    c = path.read_text()
-    if "use fuzzer_utils;" in c:
-        return
-    header_end = c.find("\n\n")
-    if header_end > 0:
-        c = c[:header_end] + "\n#[allow(unused_imports)]\nuse fuzzer_utils;\n" + c[header_end:]
-        path.write_text(c)
+    editor = _FileEditor(path)
+    editor.ensure_use_fuzzer_utils()
+    editor.flush()
 
 
 def _ensure_import_after_fuzzer_utils(path: Path, import_line: str) -> None:
     if not path.exists():
         return
-    c = path.read_text()
-    if import_line in c:
-        return
-    _ensure_use_fuzzer_utils(path)
-    c = path.read_text()
-    idx = c.find("use fuzzer_utils;")
-    if idx < 0:
-        return
-    line_end = c.find("\n", idx)
-    pos = line_end + 1 if line_end >= 0 else len(c)
-    c = c[:pos] + import_line + "\n" + c[pos:]
-    path.write_text(c)
+    editor = _FileEditor(path)
+    editor.ensure_import(import_line)
+    editor.flush()
 
 
 # -------------------------------------------------------------------------------------------------
-# regzero specific patches
+# declarative patches
 # -------------------------------------------------------------------------------------------------
 
+InsertKind = Literal["after", "after_all", "before", "fn_close"]
 
-def _patch_regzero_record_arena_emit_chip_row(openvm_install_path: Path) -> None:
 
-    path = openvm_install_path / "crates" / "vm" / "src" / "arch" / "record_arena.rs"
-    if not path.exists():
+@dataclass(frozen=True)
+class PatchSpec:
+    """A patch of one source file, applied by `_apply_patches`.
+
+    Each insert is `(kind, anchor, guard, block)`: `block` goes right after (`"after"`) or before
+    (`"before"`) the first occurrence of `anchor`, right after every occurrence (`"after_all"`), or
+    before the closing brace of the function named `anchor` (`"fn_close"`), unless `guard` is
+    already in the file.
+    """
+
+    rel: tuple[str, ...]
+    inserts: tuple[tuple[InsertKind, str, str, str], ...] = ()
+    # Lines added right after `use fuzzer_utils;`.
+    imports: tuple[str, ...] = ()
+    use_fuzzer_utils: bool = True
+    # On a missing anchor, skip the remaining inserts instead of failing the pass.
+    best_effort: bool = False
+
+
+def _apply_spec(editor: _FileEditor, spec: PatchSpec) -> None:
+    if spec.use_fuzzer_utils:
+        editor.ensure_use_fuzzer_utils()
+    for import_line in spec.imports:
+        editor.ensure_import(import_line)
+    try:
+        # Consecutive insert-afters share one scan for their anchors and guards.
+        for kind, group in groupby(spec.inserts, key=lambda insert: insert[0]):
+            if kind == "after":
+                editor.insert_after_each(
+                    [(anchor, guard, block) for _, anchor, guard, block in group]
+                )
+                continue
+            for _, anchor, guard, block in group:
+                if kind == "before":
+                    editor.insert_before(anchor=anchor, insert=block, guard=guard)
+                elif kind == "after_all":
+                    editor.insert_after_all(anchor=anchor, insert=block, guard=guard)
+                else:
+                    editor.insert_before_fn_close(fn_name=anchor, insert=block, guard=guard)
+    except RuntimeError:
+        if not spec.best_effort:
+            raise
+
+
+def _apply_file_specs(
+    path: Path, specs: list[PatchSpec], guards: _GuardManifest | None = None
+) -> None:
+    editor = _FileEditor(path, guards)
+    for spec in specs:
+        _apply_spec(editor, spec)
+    editor.flush()
+
+
+def _existing_files(paths: Iterable[Path]) -> set[Path]:
+    """The subset of `paths` that are regular files, listing each parent directory once."""
+    by_dir: dict[Path, list[Path]] = {}
+    for path in paths:
+        by_dir.setdefault(path.parent, []).append(path)
+    existing: set[Path] = set()
+    for d, dir_paths in by_dir.items():
+        try:
+            with os.scandir(d) as it:
+                names = {e.name for e in it if e.is_file()}
+        except OSError:
+            continue
+        existing.update(p for p in dir_paths if p.name in names)
+    return existing
+
+
+def _apply_patches(
+    openvm_install_path: Path,
+    specs: Iterable[PatchSpec],
+    guards: _GuardManifest | None = None,
+) -> None:
+    """Apply `specs` grouped by file, so each file is read and written once no matter how many
+    specs target it. Specs whose file does not exist are skipped."""
+    by_path: dict[Path, list[PatchSpec]] = {}
+    for spec in specs:
+        by_path.setdefault(openvm_install_path.joinpath(*spec.rel), []).append(spec)
+    existing = _existing_files(by_path)
+    paths = [path for path in by_path if path in existing]
+    if not paths:
         return
+    # Files are independent, so they are patched concurrently to overlap their I/O.
+    with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+        # Drain the iterator so worker exceptions are raised here.
+        for _ in executor.map(
+            partial(_apply_file_specs, guards=guards), paths, [by_path[p] for p in paths]
+        ):
+            pass
+
+
+# -------------------------------------------------------------------------------------------------
+# regzero specific patches
+# -------------------------------------------------------------------------------------------------
 
-    contents = path.read_text()
 
-    anchor = "let height = next_power_of_two_or_zero(rows_used);"
-    insert = r"""
+_RECORD_ARENA_PATCH = PatchSpec(
+    rel=("crates", "vm", "src", "arch", "record_arena.rs"),
+    inserts=(
+        (
+            # Every arena computes its padded height this way; each one emits its padding rows.
+            "after_all",
+            "let height = next_power_of_two_or_zero(rows_used);",
+            "// BEAK-INSERT: Emit padding rows.",
+            r"""
 
         // BEAK-INSERT: Emit padding rows.
         if height > rows_used {
@@ -122,35 +484,21 @@ def _patch_regzero_record_arena_emit_chip_row(openvm_install_path: Path) -> None
             }
         }
         // BEAK-INSERT-END
-"""
-
-    if anchor not in contents:
-        return
-    contents = contents.replace(anchor, anchor + insert)
-    path.write_text(contents)
-
-
-def _patch_regzero_interpreter_preflight_emit_instruction(openvm_install_path: Path) -> None:
-    path = openvm_install_path / "crates" / "vm" / "src" / "arch" / "interpreter_preflight.rs"
-    if not path.exists():
-        return
-
-    contents = path.read_text()
-
-    if "use fuzzer_utils;" not in contents:
-        header_end = contents.find("\n\n")
-        if header_end > 0:
-            contents = (
-                contents[:header_end]
-                + "\n#[allow(unused_imports)]\nuse fuzzer_utils;\n"
-                + contents[header_end:]
-            )
+""",
+        ),
+    ),
+    use_fuzzer_utils=False,
+    best_effort=True,
+)
 
-    contents = _insert_after(
-        contents,
-        anchor='tracing::trace!("pc: {pc:#x} | {:?}", pc_entry.insn);',
-        guard="// BEAK-INSERT: guard.interpreter_preflight.preassign",
-        insert=r"""
+_INTERPRETER_PREFLIGHT_PATCH = PatchSpec(
+    rel=("crates", "vm", "src", "arch", "interpreter_preflight.rs"),
+    inserts=(
+        (
+            "after",
+            'tracing::trace!("pc: {pc:#x} | {:?}", pc_entry.insn);',
+            "// BEAK-INSERT: guard.interpreter_preflight.preassign",
+            r"""
 
         // BEAK-INSERT: guard.interpreter_preflight.preassign
         // BEAK-INSERT: Emit instruction-level micro-op (pc/opcode/operands/timestamps) pre-assignment.
@@ -168,13 +516,12 @@ def _patch_regzero_interpreter_preflight_emit_instruction(openvm_install_path: P
         let beak_opcode = pc_entry.insn.opcode.as_usize() as u32;
         // BEAK-INSERT-END
 """,
-    )
-
-    contents = _insert_after(
-        contents,
-        anchor="state.exit_code = Ok(Some(c.as_canonical_u32()));",
-        guard="// BEAK-INSERT: guard.interpreter_preflight.terminate_branch",
-        insert=r"""
+        ),
+        (
+            "after",
+            "state.exit_code = Ok(Some(c.as_canonical_u32()));",
+            "// BEAK-INSERT: guard.interpreter_preflight.terminate_branch",
+            r"""
             // BEAK-INSERT: guard.interpreter_preflight.terminate_branch
             // BEAK-INSERT: Emit instruction-level micro-op (pc/opcode/operands/timestamps) termination branch.
             let beak_to_pc = state.pc();
@@ -204,13 +551,12 @@ def _patch_regzero_interpreter_preflight_emit_instruction(openvm_install_path: P
             fuzzer_utils::emit_execution_interaction("send", None, beak_to_pc, beak_to_timestamp);
             // BEAK-INSERT-END
 """,
-    )
-
-    contents = _insert_after(
-        contents,
-        anchor="executor.execute(vm_state_mut, &pc_entry.insn)?;",
-        guard="// BEAK-INSERT: guard.interpreter_preflight.normal_branch",
-        insert=r"""
+        ),
+        (
+            "after",
+            "executor.execute(vm_state_mut, &pc_entry.insn)?;",
+            "// BEAK-INSERT: guard.interpreter_preflight.normal_branch",
+            r"""
         // BEAK-INSERT: guard.interpreter_preflight.normal_branch
         // BEAK-INSERT: Emit instruction-level micro-op (pc/opcode/operands/timestamps) normal branch.
         let beak_to_pc = state.pc();
@@ -242,49 +588,24 @@ def _patch_regzero_interpreter_preflight_emit_instruction(openvm_install_path: P
         fuzzer_utils::emit_execution_interaction("send", None, beak_to_pc, beak_to_timestamp);
         // BEAK-INSERT-END
 """,
-    )
-
-    path.write_text(contents)
-
+        ),
+    ),
+)
 
-def _patch_regzero_rv32im_cores_emit_chip_row(openvm_install_path: Path) -> None:
-    base = openvm_install_path / "extensions" / "rv32im" / "circuit" / "src"
 
-    # (file, adapter-cols import, unique guard, insertion block)
-    targets: list[tuple[Path, str, str, str]] = [
-        (
-            base / "base_alu" / "core.rs",
-            "use crate::adapters::Rv32BaseAluAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.base_alu",
-            r"""
+# Every rv32im core gets the same chip-row frame around a chip-specific body. `{chip}` is the chip
+# directory (and guard name), `{adapter_cols}` the adapter column struct the row is read through.
+_CHIPROW_TEMPLATE = r"""
 
-        // BEAK-INSERT: guard.rv32im.base_alu
+        // BEAK-INSERT: guard.rv32im.{chip}
         // BEAK-INSERT: Emit chip-row micro-op.
         let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32BaseAluAdapterCols<F> = adapter_slice.borrow();
-        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
-        let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
-
-        // rs2_as: 1 if rs2 is a register read, 0 if an immediate.
-        let is_rs2_imm = beak_cols.rs2_as.as_canonical_u32() == 0;
-        let rs2_raw = beak_cols.rs2.as_canonical_u32();
-        let rs2_i32 = rs2_raw as i32; // preserve bit-pattern for signed immediates
-
-        fuzzer_utils::emit_base_alu_chip_row(local_opcode as u32, rd_ptr, rs1_ptr, rs2_i32, is_rs2_imm, a, record.b, record.c);
-        // BEAK-INSERT-END
-""",
-        ),
-        (
-            base / "shift" / "core.rs",
-            "use crate::adapters::Rv32BaseAluAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.shift",
-            r"""
+        let beak_cols: &{adapter_cols}<F> = adapter_slice.borrow();
+{body}        // BEAK-INSERT-END
+"""
 
-        // BEAK-INSERT: guard.rv32im.shift
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32BaseAluAdapterCols<F> = adapter_slice.borrow();
-        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
+# Operand decoding shared by chips with the same adapter.
+_ALU_OPERANDS = r"""        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
         let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
 
         // rs2_as: 1 if rs2 is a register read, 0 if an immediate.
@@ -292,109 +613,75 @@ def _patch_regzero_rv32im_cores_emit_chip_row(openvm_install_path: Path) -> None
         let rs2_raw = beak_cols.rs2.as_canonical_u32();
         let rs2_i32 = rs2_raw as i32; // preserve bit-pattern for signed immediates
 
-        fuzzer_utils::emit_shift_chip_row(opcode as u32, rd_ptr, rs1_ptr, rs2_i32, is_rs2_imm, a, record.b, record.c);
-        // BEAK-INSERT-END
-""",
-        ),
-        (
-            base / "less_than" / "core.rs",
-            "use crate::adapters::Rv32BaseAluAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.less_than",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.less_than
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32BaseAluAdapterCols<F> = adapter_slice.borrow();
-        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
+"""
+_MULT_OPERANDS = r"""        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
         let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
+        let rs2_ptr = beak_cols.rs2_ptr.as_canonical_u32();
 
-        // rs2_as: 1 if rs2 is a register read, 0 if an immediate.
-        let is_rs2_imm = beak_cols.rs2_as.as_canonical_u32() == 0;
-        let rs2_raw = beak_cols.rs2.as_canonical_u32();
-        let rs2_i32 = rs2_raw as i32; // preserve bit-pattern for signed immediates
+"""
+_BRANCH_OPERANDS = r"""        let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
+        let rs2_ptr = beak_cols.rs2_ptr.as_canonical_u32();
+        let from_pc = beak_cols.from_state.pc.as_canonical_u32();
 
-        let opcode = LessThanOpcode::from_usize(record.local_opcode as usize);
+"""
+
+# (chip directory under rv32im/circuit/src, adapter cols struct, chip-specific body)
+_RV32IM_TARGETS: tuple[tuple[str, str, str], ...] = (
+    (
+        "base_alu",
+        "Rv32BaseAluAdapterCols",
+        _ALU_OPERANDS
+        + r"""        fuzzer_utils::emit_base_alu_chip_row(local_opcode as u32, rd_ptr, rs1_ptr, rs2_i32, is_rs2_imm, a, record.b, record.c);
+""",
+    ),
+    (
+        "shift",
+        "Rv32BaseAluAdapterCols",
+        _ALU_OPERANDS
+        + r"""        fuzzer_utils::emit_shift_chip_row(opcode as u32, rd_ptr, rs1_ptr, rs2_i32, is_rs2_imm, a, record.b, record.c);
+""",
+    ),
+    (
+        "less_than",
+        "Rv32BaseAluAdapterCols",
+        _ALU_OPERANDS
+        + r"""        let opcode = LessThanOpcode::from_usize(record.local_opcode as usize);
         let mut a = [0u8; NUM_LIMBS];
         a[0] = cmp_result as u8;
 
         fuzzer_utils::emit_less_than_chip_row(opcode as u32, rd_ptr, rs1_ptr, rs2_i32, is_rs2_imm, a, record.b, record.c);
-        // BEAK-INSERT-END
 """,
-        ),
-        (
-            base / "mul" / "core.rs",
-            "use crate::adapters::Rv32MultAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.mul",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.mul
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32MultAdapterCols<F> = adapter_slice.borrow();
-        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
-        let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
-        let rs2_ptr = beak_cols.rs2_ptr.as_canonical_u32();
-
-        fuzzer_utils::emit_mul_chip_row(MulOpcode::MUL as u32, rd_ptr, rs1_ptr, rs2_ptr, a, record.b, record.c);
-        // BEAK-INSERT-END
+    ),
+    (
+        "mul",
+        "Rv32MultAdapterCols",
+        _MULT_OPERANDS
+        + r"""        fuzzer_utils::emit_mul_chip_row(MulOpcode::MUL as u32, rd_ptr, rs1_ptr, rs2_ptr, a, record.b, record.c);
 """,
-        ),
-        (
-            base / "mulh" / "core.rs",
-            "use crate::adapters::Rv32MultAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.mulh",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.mulh
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32MultAdapterCols<F> = adapter_slice.borrow();
-        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
-        let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
-        let rs2_ptr = beak_cols.rs2_ptr.as_canonical_u32();
-
-        let a_u8 = a.map(|x| x as u8);
+    ),
+    (
+        "mulh",
+        "Rv32MultAdapterCols",
+        _MULT_OPERANDS
+        + r"""        let a_u8 = a.map(|x| x as u8);
         fuzzer_utils::emit_mulh_chip_row(opcode as u32, rd_ptr, rs1_ptr, rs2_ptr, a_u8, record.b, record.c);
-        // BEAK-INSERT-END
 """,
-        ),
-        (
-            base / "divrem" / "core.rs",
-            "use crate::adapters::Rv32MultAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.divrem",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.divrem
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32MultAdapterCols<F> = adapter_slice.borrow();
-        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
-        let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
-        let rs2_ptr = beak_cols.rs2_ptr.as_canonical_u32();
-
-        let is_div = matches!(opcode, DivRemOpcode::DIV | DivRemOpcode::DIVU);
+    ),
+    (
+        "divrem",
+        "Rv32MultAdapterCols",
+        _MULT_OPERANDS
+        + r"""        let is_div = matches!(opcode, DivRemOpcode::DIV | DivRemOpcode::DIVU);
         let a_u8 = if is_div { q.map(|x| x as u8) } else { r.map(|x| x as u8) };
 
         fuzzer_utils::emit_divrem_chip_row(opcode as u32, rd_ptr, rs1_ptr, rs2_ptr, a_u8, record.b, record.c);
-        // BEAK-INSERT-END
 """,
-        ),
-        (
-            base / "branch_eq" / "core.rs",
-            "use crate::adapters::Rv32BranchAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.branch_eq",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.branch_eq
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32BranchAdapterCols<F> = adapter_slice.borrow();
-        let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
-        let rs2_ptr = beak_cols.rs2_ptr.as_canonical_u32();
-        let from_pc = beak_cols.from_state.pc.as_canonical_u32();
-
-        let opcode = BranchEqualOpcode::from_usize(record.local_opcode as usize);
+    ),
+    (
+        "branch_eq",
+        "Rv32BranchAdapterCols",
+        _BRANCH_OPERANDS
+        + r"""        let opcode = BranchEqualOpcode::from_usize(record.local_opcode as usize);
         let imm_i32 = record.imm as i32; // preserve bit-pattern
         let is_beq = opcode == BranchEqualOpcode::BEQ;
         let is_taken = if is_beq { cmp_result } else { !cmp_result };
@@ -416,24 +703,13 @@ def _patch_regzero_rv32im_cores_emit_chip_row(openvm_install_path: Path) -> None
             record.b,
             cmp_result,
         );
-        // BEAK-INSERT-END
 """,
-        ),
-        (
-            base / "branch_lt" / "core.rs",
-            "use crate::adapters::Rv32BranchAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.branch_lt",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.branch_lt
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32BranchAdapterCols<F> = adapter_slice.borrow();
-        let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
-        let rs2_ptr = beak_cols.rs2_ptr.as_canonical_u32();
-        let from_pc = beak_cols.from_state.pc.as_canonical_u32();
-
-        let opcode = BranchLessThanOpcode::from_usize(record.local_opcode as usize);
+    ),
+    (
+        "branch_lt",
+        "Rv32BranchAdapterCols",
+        _BRANCH_OPERANDS
+        + r"""        let opcode = BranchLessThanOpcode::from_usize(record.local_opcode as usize);
         let imm_i32 = record.imm as i32; // preserve bit-pattern
         let is_taken = cmp_result;
         let to_pc = if is_taken {
@@ -454,20 +730,12 @@ def _patch_regzero_rv32im_cores_emit_chip_row(openvm_install_path: Path) -> None
             record.b,
             cmp_result,
         );
-        // BEAK-INSERT-END
 """,
-        ),
-        (
-            base / "jal_lui" / "core.rs",
-            "use crate::adapters::Rv32CondRdWriteAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.jal_lui",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.jal_lui
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32CondRdWriteAdapterCols<F> = adapter_slice.borrow();
-        let needs_write = beak_cols.needs_write.as_canonical_u32() == 1;
+    ),
+    (
+        "jal_lui",
+        "Rv32CondRdWriteAdapterCols",
+        r"""        let needs_write = beak_cols.needs_write.as_canonical_u32() == 1;
         let rd_ptr = beak_cols.inner.rd_ptr.as_canonical_u32();
         let from_pc = beak_cols.inner.from_state.pc.as_canonical_u32();
         let opcode = if record.is_jal {
@@ -493,20 +761,12 @@ def _patch_regzero_rv32im_cores_emit_chip_row(openvm_install_path: Path) -> None
             record.rd_data,
             record.is_jal,
         );
-        // BEAK-INSERT-END
 """,
-        ),
-        (
-            base / "jalr" / "core.rs",
-            "use crate::adapters::Rv32JalrAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.jalr",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.jalr
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32JalrAdapterCols<F> = adapter_slice.borrow();
-
+    ),
+    (
+        "jalr",
+        "Rv32JalrAdapterCols",
+        r"""
         let needs_write = beak_cols.needs_write.as_canonical_u32() == 1;
         let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
         let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
@@ -531,35 +791,19 @@ def _patch_regzero_rv32im_cores_emit_chip_row(openvm_install_path: Path) -> None
             record.rs1_val,
             rd_data,
         );
-        // BEAK-INSERT-END
 """,
-        ),
-        (
-            base / "auipc" / "core.rs",
-            "use crate::adapters::Rv32RdWriteAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.auipc",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.auipc
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32RdWriteAdapterCols<F> = adapter_slice.borrow();
-        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
+    ),
+    (
+        "auipc",
+        "Rv32RdWriteAdapterCols",
+        r"""        let rd_ptr = beak_cols.rd_ptr.as_canonical_u32();
         fuzzer_utils::emit_auipc_chip_row(0, rd_ptr, record.imm, record.from_pc, rd_data);
-        // BEAK-INSERT-END
 """,
-        ),
-        (
-            base / "loadstore" / "core.rs",
-            "use crate::adapters::Rv32LoadStoreAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.loadstore",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.loadstore
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32LoadStoreAdapterCols<F> = adapter_slice.borrow();
-
+    ),
+    (
+        "loadstore",
+        "Rv32LoadStoreAdapterCols",
+        r"""
         let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
         let rd_rs2_ptr = beak_cols.rd_rs2_ptr.as_canonical_u32();
 
@@ -593,20 +837,12 @@ def _patch_regzero_rv32im_cores_emit_chip_row(openvm_install_path: Path) -> None
             record.prev_data,
             write_data,
         );
-        // BEAK-INSERT-END
 """,
-        ),
-        (
-            base / "load_sign_extend" / "core.rs",
-            "use crate::adapters::Rv32LoadStoreAdapterCols;",
-            "// BEAK-INSERT: guard.rv32im.load_sign_extend",
-            r"""
-
-        // BEAK-INSERT: guard.rv32im.load_sign_extend
-        // BEAK-INSERT: Emit chip-row micro-op.
-        let adapter_slice: &[F] = adapter_row;
-        let beak_cols: &Rv32LoadStoreAdapterCols<F> = adapter_slice.borrow();
-
+    ),
+    (
+        "load_sign_extend",
+        "Rv32LoadStoreAdapterCols",
+        r"""
         let rs1_ptr = beak_cols.rs1_ptr.as_canonical_u32();
         // LoadStore adapter uses a unified pointer: rd for loads, rs2 for stores.
         let rd_ptr = beak_cols.rd_rs2_ptr.as_canonical_u32();
@@ -644,38 +880,43 @@ def _patch_regzero_rv32im_cores_emit_chip_row(openvm_install_path: Path) -> None
             record.is_byte && ((shift & 1) == 1),
             record.is_byte && ((shift & 1) == 0),
         );
-        // BEAK-INSERT-END
 """,
-        ),
-    ]
+    ),
+)
 
-    for p, import_line, guard, block in targets:
-        if not p.exists():
-            continue
-        _ensure_use_fuzzer_utils(p)
-        _ensure_import_after_fuzzer_utils(p, import_line)
-        c = p.read_text()
-        try:
-            c = _insert_before_fn_close(c, fn_name="fill_trace_row", insert=block, guard=guard)
-        except RuntimeError:
-            # Some snapshots (e.g., audit commits) changed filler function names/layout.
-            # Keep install best-effort: skip this target instead of failing whole pass.
-            continue
-        p.write_text(c)
 
+# Some snapshots (e.g., audit commits) changed filler function names/layout. Keep install
+# best-effort: a core whose `fill_trace_row` is missing is skipped instead of failing the pass.
+_RV32IM_CORE_PATCHES = tuple(
+    PatchSpec(
+        rel=("extensions", "rv32im", "circuit", "src", chip, "core.rs"),
+        imports=(f"use crate::adapters::{adapter_cols};",),
+        inserts=(
+            (
+                "fn_close",
+                "fill_trace_row",
+                f"// BEAK-INSERT: guard.rv32im.{chip}",
+                _CHIPROW_TEMPLATE.format_map(
+                    {"chip": chip, "adapter_cols": adapter_cols, "body": body}
+                ),
+            ),
+        ),
+        best_effort=True,
+    )
+    for chip, adapter_cols, body in _RV32IM_TARGETS
+)
 
-def _patch_regzero_system_connector_emit_chip_row(openvm_install_path: Path) -> None:
-    # connector/mod.rs
-    connector = openvm_install_path / "crates" / "vm" / "src" / "system" / "connector" / "mod.rs"
-    if connector.exists():
-        _ensure_use_fuzzer_utils(connector)
-        c = connector.read_text()
-        try:
-            c = _insert_before(
-                c,
-                anchor="let [initial_state, final_state] =",
-                guard="// BEAK-INSERT: guard.system.connector_chip_row",
-                insert=r"""
+# System chips (connector/mod.rs, phantom/mod.rs, program/trace.rs). Also applied to the audit
+# snapshots, whose system chips share the regzero layout.
+_SYSTEM_CONNECTOR_PATCHES = (
+    PatchSpec(
+        rel=("crates", "vm", "src", "system", "connector", "mod.rs"),
+        inserts=(
+            (
+                "before",
+                "let [initial_state, final_state] =",
+                "// BEAK-INSERT: guard.system.connector_chip_row",
+                r"""
         // BEAK-INSERT: guard.system.connector_chip_row
         // BEAK-INSERT: Emit chip-row micro-op.
         let [begin_u32, end_u32] = self.boundary_states.map(|state| state.unwrap());
@@ -691,43 +932,35 @@ def _patch_regzero_system_connector_emit_chip_row(openvm_install_path: Path) ->
         );
         // BEAK-INSERT-END
 """,
-            )
-        except RuntimeError:
-            pass
-        connector.write_text(c)
-
-    # phantom/mod.rs
-    phantom = openvm_install_path / "crates" / "vm" / "src" / "system" / "phantom" / "mod.rs"
-    if phantom.exists():
-        _ensure_use_fuzzer_utils(phantom)
-        c = phantom.read_text()
-        try:
-            c = _insert_after(
-                c,
-                anchor="row.pc = F::from_canonical_u32(record.pc)",
-                guard="// BEAK-INSERT: guard.system.phantom_chip_row",
-                insert=r""";
+            ),
+        ),
+        best_effort=True,
+    ),
+    PatchSpec(
+        rel=("crates", "vm", "src", "system", "phantom", "mod.rs"),
+        inserts=(
+            (
+                "after",
+                "row.pc = F::from_canonical_u32(record.pc)",
+                "// BEAK-INSERT: guard.system.phantom_chip_row",
+                r""";
         // BEAK-INSERT: guard.system.phantom_chip_row
         // BEAK-INSERT: Emit chip-row micro-op.
         fuzzer_utils::emit_phantom_chip_row();
         // BEAK-INSERT-END
 """,
-            )
-        except RuntimeError:
-            pass
-        phantom.write_text(c)
-
-    # program/trace.rs
-    program = openvm_install_path / "crates" / "vm" / "src" / "system" / "program" / "trace.rs"
-    if program.exists():
-        _ensure_use_fuzzer_utils(program)
-        c = program.read_text()
-        try:
-            c = _insert_after(
-                c,
-                anchor="assert!(self.filtered_exec_frequencies.len() <= cached.trace.height());",
-                guard="// BEAK-INSERT: guard.system.program_chip_row",
-                insert=r"""
+            ),
+        ),
+        best_effort=True,
+    ),
+    PatchSpec(
+        rel=("crates", "vm", "src", "system", "program", "trace.rs"),
+        inserts=(
+            (
+                "after",
+                "assert!(self.filtered_exec_frequencies.len() <= cached.trace.height());",
+                "// BEAK-INSERT: guard.system.program_chip_row",
+                r"""
         // BEAK-INSERT: guard.system.program_chip_row
         // BEAK-INSERT: Emit chip-row micro-op. Trace is BabyBear; reinterpret as &BabyBear and use as_canonical_u32().
         use p3_baby_bear::BabyBear;
@@ -754,10 +987,18 @@ def _patch_regzero_system_connector_emit_chip_row(openvm_install_path: Path) ->
         }
         // BEAK-INSERT-END
 """,
-            )
-        except RuntimeError:
-            pass
-        program.write_text(c)
+            ),
+        ),
+        best_effort=True,
+    ),
+)
+
+_REGZERO_PATCHES = (
+    _RECORD_ARENA_PATCH,
+    _INTERPRETER_PREFLIGHT_PATCH,
+    *_RV32IM_CORE_PATCHES,
+    *_SYSTEM_CONNECTOR_PATCHES,
+)
 
 
 def _patch_336f_base_alu_adapter_emit_chip_row(openvm_install_path: Path) -> None:
@@ -1603,6 +1844,22 @@ def _patch_witness_step_wildcard_support(openvm_install_path: Path) -> None:
     path.write_text(c)
 
 
+# Patterns for the audit-snapshot patches below, compiled once at import time rather than per call.
+# Accepts both `use serde::{Deserialize, Serialize};` and
+# `use serde::{de::DeserializeOwned, Deserialize, Serialize};` variants.
+_RE_SERDE_USE = re.compile(r"^use serde::\{[^}]*\};\s*$", re.MULTILINE)
+# Multi-line `postprocess` assignment in audit `integration_api.rs` (ending at `?;`).
+_RE_POSTPROCESS_ASSIGN = re.compile(
+    r"(let\s+\(to_state,\s*write_record\)\s*=\s*\n"
+    r"\s*self\.adapter\s*\n\s*\.postprocess\([\s\S]*?\)\?\s*;)",
+    re.MULTILINE,
+)
+_RE_USE_CRATE_BLOCK = re.compile(r"\nuse crate::\{[\s\S]*?\};\n", re.MULTILINE)
+_RE_USE_CRATE_MEMORY_IMAGE = re.compile(
+    r"use crate::\{[\s\S]*?system::memory::MemoryImage,[\s\S]*?\};"
+)
+
+
 # def _patch_audit_integration_api_for_microops(openvm_install_path: Path) -> None:
 #     """
 #     Audit snapshots (336/f038) have a slightly different `integration_api.rs` layout (multi-line
@@ -1626,24 +1883,14 @@ def _patch_witness_step_wildcard_support(openvm_install_path: Path) -> None:
 
 #     # Ensure serde_json::json is available.
 #     if "use serde_json::json;" not in contents:
-#         # Accept both `use serde::{Deserialize, Serialize};` and
-#         # `use serde::{de::DeserializeOwned, Deserialize, Serialize};` variants.
-#         contents, n = re.subn(
-#             r"^use serde::\{[^}]*\};\s*$",
-#             lambda m: m.group(0) + "\nuse serde_json::json;",
-#             contents,
-#             count=1,
-#             flags=re.MULTILINE,
+#         contents, n = _RE_SERDE_USE.subn(
+#             lambda m: m.group(0) + "\nuse serde_json::json;", contents, count=1
 #         )
 #         if n == 0:
 #             raise RuntimeError("unable to locate serde import to append serde_json::json")
 
 #     # Insert after the multi-line postprocess assignment (ending at `?;`).
-#     m = re.search(
-#         r"(let\s+\(to_state,\s*write_record\)\s*=\s*\n\s*self\.adapter\s*\n\s*\.postprocess\([\s\S]*?\)\?\s*;)",
-#         contents,
-#         flags=re.MULTILINE,
-#     )
+#     m = _RE_POSTPROCESS_ASSIGN.search(contents)
 #     if not m:
 #         raise RuntimeError("unable to locate adapter postprocess assignment in integration_api.rs")
 
@@ -1839,12 +2086,8 @@ def _patch_witness_step_wildcard_support(openvm_install_path: Path) -> None:
 
 #     # Ensure serde_json::json is available (we emit small JSON payloads).
 #     if "use serde_json::json;" not in contents:
-#         contents, n = re.subn(
-#             r"^use serde::\{[^}]*\};\s*$",
-#             lambda m: m.group(0) + "\nuse serde_json::json;",
-#             contents,
-#             count=1,
-#             flags=re.MULTILINE,
+#         contents, n = _RE_SERDE_USE.subn(
+#             lambda m: m.group(0) + "\nuse serde_json::json;", contents, count=1
 #         )
 #         if n == 0:
 #             # Best-effort: insert after the last `use` in the header.
@@ -1928,7 +2171,7 @@ def _patch_witness_step_wildcard_support(openvm_install_path: Path) -> None:
 #     # Ensure imports used by the injected blocks.
 #     if "use serde_json::json;" not in contents:
 #         # Prefer inserting after the top-level `use crate::{ ... };` block.
-#         m = re.search(r"\nuse crate::\{[\s\S]*?\};\n", contents, flags=re.MULTILINE)
+#         m = _RE_USE_CRATE_BLOCK.search(contents)
 #         if m:
 #             pos = m.end()
 #             contents = contents[:pos] + "use serde_json::json;\n" + contents[pos:]
@@ -1944,7 +2187,7 @@ def _patch_witness_step_wildcard_support(openvm_install_path: Path) -> None:
 
 #     if "use crate::system::memory::online::MemoryLogEntry;" not in contents:
 #         # Insert after existing `use crate::{ ... system::memory::MemoryImage, ... };` block if present.
-#         m = re.search(r"use crate::\{[\s\S]*?system::memory::MemoryImage,[\s\S]*?\};", contents)
+#         m = _RE_USE_CRATE_MEMORY_IMAGE.search(contents)
 #         if m:
 #             insert_pos = m.end()
 #             contents = (
@@ -2240,19 +2483,22 @@ def _patch_witness_step_wildcard_support(openvm_install_path: Path) -> None:
 #     segment_rs.write_text(contents)
 
 
+@skip_if_done
 def apply(*, openvm_install_path: Path, commit_or_branch: str) -> None:
     commit = resolve_openvm_commit(commit_or_branch)
     if commit == OPENVM_BENCHMARK_REGZERO_COMMIT:
-        _patch_regzero_record_arena_emit_chip_row(openvm_install_path)
-        _patch_regzero_interpreter_preflight_emit_instruction(openvm_install_path)
-        _patch_regzero_rv32im_cores_emit_chip_row(openvm_install_path)
-        _patch_regzero_system_connector_emit_chip_row(openvm_install_path)
+        guards = _GuardManifest(openvm_install_path)
+        try:
+            _apply_patches(openvm_install_path, _REGZERO_PATCHES, guards)
+        finally:
+            # Entries are only added after a file was flushed, so a partial run is still accurate.
+            guards.save()
     elif commit in {OPENVM_BENCHMARK_336F_COMMIT, OPENVM_BENCHMARK_F038_COMMIT}:
         # Keep audit snapshots on a lightweight, layout-compatible injection set.
         # Start with one concrete adapter-level injection used by loop2/audit-o5 workflow.
         # Also emit system connector chip-row as a first-class trace record, so connector-related
         # loop2 injections do not rely on coarse proxy buckets.
-        _patch_regzero_system_connector_emit_chip_row(openvm_install_path)
+        _apply_patches(openvm_install_path, _SYSTEM_CONNECTOR_PATCHES)
         _patch_336f_base_alu_adapter_emit_chip_row(openvm_install_path)
         _patch_336f_auipc_core_emit_chip_row(openvm_install_path)
         _patch_336f_loadstore_core_emit_chip_row(openvm_install_path)
@@ -0,0 +1,101 @@
+"""
+Completion sentinels for patch passes.
+
+After a pass succeeds it records the commit it was applied for and a hash of the code that produced
+the patches (the pass module, the helpers every pass uses and the fuzzer_utils crate templates) in
+`.beak/<pass>.done` under the OpenVM root. A later run for the same commit with unchanged code
+finds a matching sentinel and skips the pass. A sentinel from different code means the tree holds
+patches that code no longer makes: the checkout has to be reset (which removes the sentinels
+together with the patches), not patched again in place.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import inspect
+import json
+from functools import lru_cache, wraps
+from pathlib import Path
+from typing import Callable, Iterable
+
+from openvm_fuzzer.settings import resolve_openvm_commit
+
+SENTINEL_DIR = ".beak"
+
+
+# Code besides the pass module itself that shapes what a pass writes.
+_SHARED_MODULES = (
+    "openvm_fuzzer.passes.steps",
+    "openvm_fuzzer.settings",
+    "zkvm_fuzzer_utils.file",
+)
+_TEMPLATE_DIR = Path(__file__).resolve().parents[1] / "fuzzer_utils_crate"
+
+
+@lru_cache(maxsize=None)
+def _source_signature(module_name: str) -> str:
+    h = hashlib.sha256()
+    for name in (module_name, *_SHARED_MODULES):
+        h.update(inspect.getsource(importlib.import_module(name)).encode())
+    for template in sorted(_TEMPLATE_DIR.iterdir()):
+        if template.is_file():
+            h.update(template.name.encode())
+            h.update(template.read_bytes())
+    return h.hexdigest()
+
+
+def _sentinel_path(openvm_install_path: Path, module_name: str) -> Path:
+    return openvm_install_path / SENTINEL_DIR / f"{module_name.rsplit('.', 1)[-1]}.done"
+
+
+def _record(module_name: str, commit: str) -> dict[str, str]:
+    return {"commit": commit, "sig": _source_signature(module_name)}
+
+
+def _read_sentinel(openvm_install_path: Path, module_name: str) -> object | None:
+    sentinel = _sentinel_path(openvm_install_path, module_name)
+    if not sentinel.is_file():
+        return None
+    try:
+        return json.loads(sentinel.read_text())
+    except json.JSONDecodeError:
+        return {}
+
+
+def is_pass_done(openvm_install_path: Path, module_name: str, commit: str) -> bool:
+    return _read_sentinel(openvm_install_path, module_name) == _record(module_name, commit)
+
+
+def are_passes_done(openvm_install_path: Path, module_names: Iterable[str], commit: str) -> bool:
+    return all(is_pass_done(openvm_install_path, name, commit) for name in module_names)
+
+
+def mark_pass_done(openvm_install_path: Path, module_name: str, commit: str) -> None:
+    sentinel = _sentinel_path(openvm_install_path, module_name)
+    sentinel.parent.mkdir(parents=True, exist_ok=True)
+    sentinel.write_text(json.dumps(_record(module_name, commit)))
+
+
+def skip_if_done(apply: Callable[..., None]) -> Callable[..., None]:
+    """
+    Wrap a pass's `apply`: skip it when its sentinel matches, record the sentinel on success.
+    Refuses to run over a sentinel left by other code or another commit.
+    """
+    module_name = apply.__module__
+
+    @wraps(apply)
+    def wrapper(*, openvm_install_path: Path, commit_or_branch: str) -> None:
+        commit = resolve_openvm_commit(commit_or_branch)
+        recorded = _read_sentinel(openvm_install_path, module_name)
+        if recorded == _record(module_name, commit):
+            return
+        if recorded is not None:
+            raise RuntimeError(
+                f"{openvm_install_path} was patched by a different {module_name} or for another "
+                "commit; reset the checkout before patching it again"
+            )
+        apply(openvm_install_path=openvm_install_path, commit_or_branch=commit_or_branch)
+        mark_pass_done(openvm_install_path, module_name, commit)
+
+    return wrapper
@@ -0,0 +1,58 @@
+"""
+Concurrent execution of independent patch steps within a pass.
+
+Each step declares the paths (relative to the OpenVM root) it writes. Steps are grouped into levels:
+a step runs in the first level after every earlier step whose paths overlap with its own, so steps
+touching disjoint trees run concurrently while overlapping ones keep their declaration order.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class PassStep:
+    fn: Callable[[], None]
+    touches: tuple[str, ...]
+
+
+def _overlaps(a: tuple[str, ...], b: tuple[str, ...]) -> bool:
+    # Two paths overlap if one is (component-wise) a prefix of the other.
+    for x in a:
+        px = PurePosixPath(x).parts
+        for y in b:
+            py = PurePosixPath(y).parts
+            n = min(len(px), len(py))
+            if px[:n] == py[:n]:
+                return True
+    return False
+
+
+def _levels(steps: list[PassStep]) -> list[list[PassStep]]:
+    step_levels: list[int] = []
+    for i, step in enumerate(steps):
+        level = 0
+        for j in range(i):
+            if _overlaps(step.touches, steps[j].touches):
+                level = max(level, step_levels[j] + 1)
+        step_levels.append(level)
+    levels: list[list[PassStep]] = [[] for _ in range(max(step_levels, default=-1) + 1)]
+    for step, level in zip(steps, step_levels):
+        levels[level].append(step)
+    return levels
+
+
+def run_steps(steps: list[PassStep]) -> None:
+    for level in _levels(steps):
+        if len(level) == 1:
+            level[0].fn()
+            continue
+        with ThreadPoolExecutor(max_workers=len(level)) as executor:
+            futures = [executor.submit(step.fn) for step in level]
+            # Surface failures in declaration order; leaving the `with` waits for the rest.
+            for future in futures:
+                future.result()
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 #
 # ZKVM Specific Versions and URLs
 #
@@ -22,6 +24,8 @@ OPENVM_AVAILABLE_COMMITS_OR_BRANCHES = [
     OPENVM_BASELINE_ARGUZZ_COMMIT,
 ]
 OPENVM_ZKVM_GIT_REPOSITORY = "https://github.com/AnonForkBot/openvm.git"
+# Shared bare mirror used as `--reference` so repeated installs only fetch deltas.
+OPENVM_GIT_CACHE_DIR = Path.home() / ".cache" / "openvm-fuzzer" / "openvm.git"
 
 
 def iter_openvm_snapshots() -> list[str]:
@@ -1,21 +1,58 @@
 import logging
+import os
 import re
 import shutil
 from pathlib import Path
+from typing import Iterable
 
+from openvm_fuzzer.passes.sentinel import SENTINEL_DIR, are_passes_done
 from openvm_fuzzer.settings import (
+    OPENVM_GIT_CACHE_DIR,
     OPENVM_ZKVM_GIT_REPOSITORY,
     resolve_openvm_commit,
 )
-from zkvm_fuzzer_utils.git import git_clone_and_switch, git_reset_and_switch, is_git_repository
+from zkvm_fuzzer_utils.git import (
+    GitException,
+    git_clone_and_switch,
+    git_current_commit,
+    git_is_clean,
+    git_reset_and_switch,
+    is_git_repository,
+)
 
 logger = logging.getLogger("fuzzer")
 
 
-def clone_and_checkout_openvm(*, dest: Path, commit_or_branch: str) -> Path:
+def _is_reusable(dest: Path, commit: str, patch_passes: Iterable[str]) -> bool:
+    """
+    True if `dest` is at `commit` and either untouched or fully patched by the current pass code.
+    Anything else (a crashed or partial run, patches from older pass code) needs a reset.
+    """
+    try:
+        if git_current_commit(dest) != commit:
+            return False
+        if git_is_clean(dest):
+            return True
+        patch_passes = tuple(patch_passes)
+        return bool(patch_passes) and are_passes_done(dest, patch_passes, commit)
+    except GitException:
+        return False
+
+
+def clone_and_checkout_openvm(
+    *,
+    dest: Path,
+    commit_or_branch: str,
+    patch_passes: Iterable[str] = (),
+    recurse_submodules: bool = False,
+    jobs: int | None = os.cpu_count(),
+) -> Path:
     """
     Clone OpenVM from the canonical repository into `dest`, then checkout the resolved commit.
-    If `dest` already exists as a git repo, reset local modifications and switch commits.
+    If `dest` already exists as a git repo, reset local modifications and switch commits, unless
+    it is already checked out at the resolved commit and either clean or patched by every pass in
+    `patch_passes` (module names) with the current code, in which case it is reused as is.
+    `jobs` bounds git's parallel fetches; submodules are only initialized on request.
     """
     resolved = resolve_openvm_commit(commit_or_branch)
     dest = dest.expanduser().resolve()
@@ -23,11 +60,26 @@ def clone_and_checkout_openvm(*, dest: Path, commit_or_branch: str) -> Path:
     if dest.exists() and not is_git_repository(dest):
         shutil.rmtree(dest)
 
+    if is_git_repository(dest) and _is_reusable(dest, resolved, patch_passes):
+        logger.info("openvm repo @ %s already at %s", dest, resolved)
+        return dest
+
     if not is_git_repository(dest):
         logger.info("cloning openvm repo to %s", dest)
-        git_clone_and_switch(dest, OPENVM_ZKVM_GIT_REPOSITORY, resolved)
+        git_clone_and_switch(
+            dest,
+            OPENVM_ZKVM_GIT_REPOSITORY,
+            resolved,
+            cache_dir=OPENVM_GIT_CACHE_DIR,
+            # OpenVM is large and only one commit is ever checked out per install.
+            filter_spec="blob:none",
+            recurse_submodules=recurse_submodules,
+            jobs=jobs,
+        )
     else:
         logger.info("resetting and switching openvm repo @ %s", dest)
-        git_reset_and_switch(dest, resolved)
+        # The reset discards the patches, so the pass sentinels have to go with them.
+        shutil.rmtree(dest / SENTINEL_DIR, ignore_errors=True)
+        git_reset_and_switch(dest, resolved, recurse_submodules=recurse_submodules, jobs=jobs)
 
     return dest
@@ -1,27 +1,45 @@
 from __future__ import annotations
 
 import argparse
+import binascii
 import json
+import os
 import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Iterable
 
-
-def _sign_extend(value: int, bits: int) -> int:
-    sign_bit = 1 << (bits - 1)
-    mask = (1 << bits) - 1
-    value &= mask
-    return (value ^ sign_bit) - sign_bit
+try:
+    import orjson
+except ImportError:  # Optional: only speeds up writing the JSONL output.
+    orjson = None
+
+# Dump files are matched as raw bytes, so they are never decoded as a whole. One
+# multi-line pattern finds both line kinds in a single pass over the file:
+#   group 1/2: label line `<addr> <name>:`
+#   group 3:   instruction line `<addr>: <8-hex-digit word> ...`
+# Horizontal whitespace only, so a match never spans a line break.
+_DUMP_LINE_RE = re.compile(
+    rb"""
+    ^[ \t]*(?:
+        ([0-9a-fA-F]+)[ \t]+<([^>]+)>:[ \t\r]*$
+      | [0-9a-fA-F]+:[ \t]*([0-9a-fA-F]{8})\b
+    )
+    """,
+    re.MULTILINE | re.VERBOSE,
+)
+# Label lines only: used to jump over blocks that are not `test*` blocks, so their
+# instruction lines are never captured.
+_LABEL_LINE_RE = re.compile(
+    rb"^[ \t]*([0-9a-fA-F]+)[ \t]+<([^>]+)>:[ \t\r]*$", re.MULTILINE
+)
 
 
 def _opcode(word: int) -> int:
     return word & 0x7F
 
 
-def _rd(word: int) -> int:
-    return (word >> 7) & 0x1F
-
-
 def _funct3(word: int) -> int:
     return (word >> 12) & 0x7
 
@@ -42,13 +60,9 @@ def _is_branch_b_type(word: int) -> bool:
     return _opcode(word) == 0x63
 
 
-def _imm_b(word: int) -> int:
-    imm12 = (word >> 31) & 1
-    imm11 = (word >> 7) & 1
-    imm10_5 = (word >> 25) & 0x3F
-    imm4_1 = (word >> 8) & 0xF
-    imm = (imm12 << 11) | (imm11 << 10) | (imm10_5 << 4) | (imm4_1 << 1)
-    return _sign_extend(imm, 12) * 2
+def _imm_b_is_forward(word: int) -> bool:
+    """B-type immediate > 0: sign bit (bit 31) clear and some immediate bit set."""
+    return not word & 0x80000000 and word & 0xFE000F80 != 0
 
 
 def _encode_rtype(
@@ -66,123 +80,144 @@ def _encode_rtype(
 
 ORACLE_RESULT_REG = 10  # a0
 GP_REG = 3
+# {x0, gp} as a register bitmask.
+_ZERO_GP_MASK = (1 << 0) | (1 << GP_REG)
 
 # Map zkvm-unsupported / reserved regs to temporaries:
 # sp(2), gp(3), tp(4), x8/fp(8), x9/s1(9) -> t0(5), t1(6), t2(7), t3(28), t4(29)
 REG_REMAP = {2: 5, 3: 6, 4: 7, 8: 28, 9: 29}
 
-
-def _remap_reg(r: int) -> int:
-    return REG_REMAP.get(r, r)
-
-
+# REG_REMAP over all 32 registers, so a register field is remapped with one index.
+_REMAP_LUT = tuple(REG_REMAP.get(r, r) for r in range(32))
+# The same table pre-shifted to the rd (bit 7), rs1 (bit 15) and rs2 (bit 20) fields, so
+# a remapped field is ORed back into the word without shifting it into place.
+_REMAP_LUT_RD = tuple(r << 7 for r in _REMAP_LUT)
+_REMAP_LUT_RS1 = tuple(r << 15 for r in _REMAP_LUT)
+_REMAP_LUT_RS2 = tuple(r << 20 for r in _REMAP_LUT)
+
+
+# Instruction format by opcode (low 7 bits), so decoding a word is one table index.
+_OP_OTHER, _OP_R, _OP_I, _OP_S, _OP_B, _OP_U, _OP_J = range(7)
+_OP_CLASS = [_OP_OTHER] * 128
+for _op, _cls in (
+    (0x33, _OP_R),
+    (0x3B, _OP_R),
+    (0x13, _OP_I),
+    (0x03, _OP_I),
+    (0x67, _OP_I),
+    (0x73, _OP_I),
+    (0x23, _OP_S),
+    (0x63, _OP_B),
+    (0x37, _OP_U),
+    (0x17, _OP_U),
+    (0x6F, _OP_J),
+):
+    _OP_CLASS[_op] = _cls
+_OP_CLASS = tuple(_OP_CLASS)
+
+
+# Pure function of `word`, and test dumps repeat the same words a lot (`li`, `lui`,
+# pass/fail branches), so repeated words cost one cache probe.
+@lru_cache(maxsize=1 << 16)
 def _rewrite_word_regs(word: int) -> int:
     """Rewrite rd/rs1/rs2: sp,gp,tp,x8,x9 -> t0,t1,t2,t3,t4."""
-    opcode = _opcode(word)
-    if opcode in (0x33, 0x3B):
-        rd, rs1, rs2 = _rd(word), _rs1(word), _rs2(word)
-        rd, rs1, rs2 = _remap_reg(rd), _remap_reg(rs1), _remap_reg(rs2)
+    # Runs once per instruction of every seed: fields are decoded inline and remapped
+    # through the pre-shifted `_REMAP_LUT_*` tables.
+    cls = _OP_CLASS[word & 0x7F]
+    if cls == _OP_OTHER:
+        return word
+    if cls == _OP_R:
         # Keep funct7/funct3/opcode unchanged; only rewrite rd/rs1/rs2.
-        return (word & 0xFE00707F) | (rd << 7) | (rs1 << 15) | (rs2 << 20)
-    if opcode in (0x13, 0x03, 0x67, 0x73):
-        rd, rs1 = _rd(word), _rs1(word)
-        rd, rs1 = _remap_reg(rd), _remap_reg(rs1)
+        return (
+            (word & 0xFE00707F)
+            | _REMAP_LUT_RD[(word >> 7) & 0x1F]
+            | _REMAP_LUT_RS1[(word >> 15) & 0x1F]
+            | _REMAP_LUT_RS2[(word >> 20) & 0x1F]
+        )
+    if cls == _OP_I:
         # Keep imm/funct3/opcode unchanged; only rewrite rd/rs1.
-        return (word & 0xFFF0707F) | (rd << 7) | (rs1 << 15)
-    if opcode == 0x23:
-        rs1, rs2 = _rs1(word), _rs2(word)
-        rs1, rs2 = _remap_reg(rs1), _remap_reg(rs2)
-        return (word & 0x01FFF07F) | (rs1 << 15) | (rs2 << 20)
-    if opcode == 0x63:
-        rs1, rs2 = _rs1(word), _rs2(word)
-        rs1, rs2 = _remap_reg(rs1), _remap_reg(rs2)
-        return (word & 0x01FFF07F) | (rs1 << 15) | (rs2 << 20)
-    if opcode in (0x37, 0x17):
-        rd = _remap_reg(_rd(word))
-        return (word & 0xFFFFF07F) | (rd << 7)
-    if opcode == 0x6F:
-        rd = _remap_reg(_rd(word))
-        return (word & 0xFFFFF07F) | (rd << 7)
-    return word
-
-
-def _strip_trailing_bne_zero_gp_pass(words: list[int]) -> list[int]:
+        return (
+            (word & 0xFFF0707F)
+            | _REMAP_LUT_RD[(word >> 7) & 0x1F]
+            | _REMAP_LUT_RS1[(word >> 15) & 0x1F]
+        )
+    if cls == _OP_S or cls == _OP_B:
+        return (
+            (word & 0x01FFF07F)
+            | _REMAP_LUT_RS1[(word >> 15) & 0x1F]
+            | _REMAP_LUT_RS2[(word >> 20) & 0x1F]
+        )
+    # U-type and J-type only carry rd.
+    return (word & 0xFFFFF07F) | _REMAP_LUT_RD[(word >> 7) & 0x1F]
+
+
+def _strip_trailing_bne_zero_gp_pass(words: array[int]) -> array[int]:
+    # Edits `words` in place; callers hand over the block and use the returned array.
     while len(words) >= 1:
         br = words[-1]
-        if not _is_bne(br) or _imm_b(br) <= 0:
+        if not _is_bne(br) or not _imm_b_is_forward(br):
             break
-        r1, r2 = _rs1(br), _rs2(br)
-        if {r1, r2} == {0, GP_REG}:
-            words = words[:-1]
+        if (1 << _rs1(br)) | (1 << _rs2(br)) == _ZERO_GP_MASK:
+            del words[-1]
             continue
         break
     return words
 
 
-def _replace_branch_to_fail(words: list[int]) -> list[int]:
+def _finalize_block(words: array[int]) -> list[int]:
+    """Turn a parsed test block into the seed's instruction list.
+
+    Trailing `bne zero, gp` pass branches are dropped, a final forward branch becomes
+    `xor a0, rs1, rs2` (the oracle result), and every register is remapped, all in a
+    single traversal of the block.
+    """
     words = _strip_trailing_bne_zero_gp_pass(words)
-    if len(words) < 1:
-        return words
+    out = list(map(_rewrite_word_regs, words))
+    if not out:
+        return out
 
     br = words[-1]
-    if not _is_branch_b_type(br) or _imm_b(br) <= 0:
-        return words
+    if not _is_branch_b_type(br) or not _imm_b_is_forward(br):
+        return out
 
-    rs1, rs2 = _rs1(br), _rs2(br)
-    xor_inst = _encode_rtype(0x0, rs2, rs1, 0x4, ORACLE_RESULT_REG)
-    return words[:-1] + [xor_inst]
-
-
-def _parse_inst_words(lines: Iterable[str]) -> list[int]:
-    inst_re = re.compile(r"^\s*[0-9a-fA-F]+:\s*([0-9a-fA-F]{8})\b")
-    words: list[int] = []
-    for line in lines:
-        m_inst = inst_re.match(line)
-        if not m_inst:
-            continue
-        words.append(int(m_inst.group(1), 16))
-    return words
+    # The xor is built from the remapped branch operands, so it needs no rewrite.
+    rs1, rs2 = _REMAP_LUT[_rs1(br)], _REMAP_LUT[_rs2(br)]
+    out[-1] = _encode_rtype(0x0, rs2, rs1, 0x4, ORACLE_RESULT_REG)
+    return out
 
 
 def parse_riscv_tests(
-    lines: Path,
+    data: bytes,
     *,
     source: str = None,
     verbose: bool = False,
 ) -> list[dict]:
     """
-    Parse a riscv64-unknown-elf-objdump .dump file and extract instruction
-    streams from labels starting with `test`. Output is pure u32 word arrays.
+    Parse the raw bytes of a riscv64-unknown-elf-objdump .dump file and
+    extract instruction streams from labels starting with `test`. Output is pure
+    u32 word arrays.
     """
 
-    label_re = re.compile(r"^\s*([0-9a-fA-F]+)\s+<([^>]+)>:\s*$")
-
     seeds: list[dict] = []
     current_label: str | None = None
     current_label_addr: int | None = None
-    current_lines: list[str] = []
+    # Instruction words of the current `test*` block, parsed as the lines are scanned.
+    # Kept as unboxed u32s until the final rewrite builds the JSON list.
+    current_words = array("I")
 
     def flush():
-        nonlocal current_label, current_label_addr, current_lines
+        nonlocal current_label, current_label_addr, current_words
         if (
             current_label is None
             or not current_label.startswith("test")
-            or not current_lines
+            or not current_words
         ):
             current_label = None
             current_label_addr = None
-            current_lines = []
-            return
-
-        words = _parse_inst_words(current_lines)
-        if not words:
-            current_label = None
-            current_label_addr = None
-            current_lines = []
+            current_words = array("I")
             return
 
-        inst_words = _replace_branch_to_fail(words)
-        inst_words = [_rewrite_word_regs(w) for w in inst_words]
+        inst_words = _finalize_block(current_words)
 
         seed = {
             "instructions": inst_words,
@@ -204,26 +239,67 @@ def parse_riscv_tests(
         seeds.append(seed)
         current_label = None
         current_label_addr = None
-        current_lines = []
-
-    for line in lines:
-        m_label = label_re.match(line)
-        if m_label:
-            flush()
-            current_label_addr = int(m_label.group(1), 16)
-            current_label = m_label.group(2)
-            current_lines = []
+        current_words = array("I")
+
+    def start_block(m: re.Match) -> bool:
+        """Flush the previous block and open the one labelled by `m`."""
+        nonlocal current_label, current_label_addr, current_words
+        flush()
+        current_label_addr = int(m.group(1), 16)
+        current_label = m.group(2).decode("utf-8", errors="replace")
+        current_words = array("I")
+        return current_label.startswith("test")
+
+    # Hot loop, run for every matching line of every dump: the regex engine skips the
+    # lines that are neither labels nor instructions, and whether the current block
+    # is a `test*` block is decided once per label. Outside `test*` blocks only the
+    # next label is searched for, so skipped instructions never reach Python.
+    # The captured word is always 8 hex digits: unhexlify it to 4 big-endian bytes,
+    # which is cheaper than the general-purpose `int(..., 16)`.
+    unhexlify = binascii.unhexlify
+    from_bytes = int.from_bytes
+    search_label = _LABEL_LINE_RE.search
+    pos = 0
+    in_test = False
+    while True:
+        if not in_test:
+            m = search_label(data, pos)
+            if m is None:
+                break
+            in_test = start_block(m)
+            pos = m.end()
             continue
 
-        if current_label is None or not current_label.startswith("test"):
-            continue
-
-        current_lines.append(line)
+        for m in _DUMP_LINE_RE.finditer(data, pos):
+            word = m.group(3)
+            if word is not None:
+                current_words.append(from_bytes(unhexlify(word), "big"))
+                continue
+            in_test = start_block(m)
+            pos = m.end()
+            if not in_test:
+                break
+        else:
+            break
 
     flush()
     return seeds
 
 
+def _json_line(seed: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(seed) + b"\n"
+    return (json.dumps(seed, separators=(",", ":")) + "\n").encode()
+
+
+def _parse_dump_file(dump_file: Path, *, root: Path, verbose: bool) -> list[dict]:
+    return parse_riscv_tests(
+        dump_file.read_bytes(),
+        source=root.joinpath(dump_file.relative_to(root)).as_posix(),
+        verbose=verbose,
+    )
+
+
 def _main() -> None:
     parser = argparse.ArgumentParser(
         description="Extract initial seeds from RISC-V test dump files"
@@ -257,25 +333,29 @@ def _main() -> None:
             f"Input path does not exist or is not a file/dir: {input_path}"
         )
 
-    all_seeds: list[dict] = []
-    for dump_file in dump_files:
-        text = dump_file.read_text(encoding="utf-8", errors="replace").splitlines()
-        seeds = parse_riscv_tests(
-            text,
-            source=root.joinpath(dump_file.relative_to(root)).as_posix(),
-            verbose=args.verbose,
-        )
-        if args.verbose:
-            print(
-                f"[parse_riscv_tests] {dump_file}: total matched seeds = {len(seeds)}\n"
-            )
-        all_seeds.extend(seeds)
-
-    with output_file.open("w", encoding="utf-8") as f:
-        for seed in all_seeds:
-            f.write(json.dumps(seed) + "\n")
-
-    print(f"Wrote {len(all_seeds)} seeds to {output_file}")
+    parse = partial(_parse_dump_file, root=root, verbose=args.verbose)
+    num_seeds = 0
+    # Dump files are independent, so they are parsed on all cores. Verbose runs stay
+    # serial so the per-seed log keeps file order. Each file's seeds are written as
+    # soon as they arrive instead of being held until the end.
+    with (
+        ProcessPoolExecutor(max_workers=os.cpu_count()) as executor,
+        output_file.open("wb") as f,
+    ):
+        if args.verbose or len(dump_files) < 2:
+            per_file = map(parse, dump_files)
+        else:
+            per_file = executor.map(parse, dump_files)
+        for dump_file, seeds in zip(dump_files, per_file):
+            if args.verbose:
+                print(
+                    f"[parse_riscv_tests] {dump_file}: "
+                    f"total matched seeds = {len(seeds)}\n"
+                )
+            f.writelines(map(_json_line, seeds))
+            num_seeds += len(seeds)
+
+    print(f"Wrote {num_seeds} seeds to {output_file}")
 
 
 if __name__ == "__main__":
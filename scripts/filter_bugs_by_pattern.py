@@ -20,15 +20,42 @@ Usage:
 
   # Only output line numbers
   python scripts/filter_bugs_by_pattern.py --default-exclude --lines-only storage/.../bugs.jsonl
+
+  # Filter a large file with 8 worker processes
+  python scripts/filter_bugs_by_pattern.py --default-exclude --parallel-shards 8 -o filtered.jsonl storage/.../bugs.jsonl
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import mmap
+import os
+import re
+import shutil
 import sys
-from collections import defaultdict
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import product
 from pathlib import Path
+from typing import BinaryIO
+
+try:
+    import orjson
+except ImportError:  # Optional: only speeds up parsing the JSONL input.
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:  # Optional: pysimdjson parses lazily, so unread fields cost nothing.
+    simdjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter.
+_json_loads = json.loads if orjson is None else orjson.loads
+# One parser for the process: it reuses its buffers from line to line.
+_simdjson_parser = None if simdjson is None else simdjson.Parser()
 
 # Default uninteresting: timeout, read/write regzero, and known bugs from docs/BUG_REPORTS.md
 DEFAULT_UNINTERESTING = [
@@ -45,30 +72,47 @@ DEFAULT_UNINTERESTING = [
 ]
 
 
+# classify_backend_error rules in priority order, as (category, needle, lowercase
+# needle): the first rule whose needles occur in the error (the lowercase one in the
+# lowercased error) names its category. None means no needle of that kind.
+_BACKEND_ERROR_RULES: tuple[tuple[str, str | None, str | None], ...] = (
+    ("timeout", None, "timed out"),
+    ("timeout", None, "worker killed"),
+    ("failed_exit2", "FailedWithExitCode(2)", None),
+    ("memory_out_of_bounds", "Memory access out of bounds", None),
+    ("unaligned_memory", None, "unaligned memory"),
+    ("unaligned_memory", "STOREW", None),
+    ("unaligned_memory", "LOAD", "unaligned"),
+    ("index_out_of_bounds", None, "index out of bounds"),
+    ("index_out_of_bounds", None, "the len is 0"),
+    ("invalid_loadstore_op", "Invalid LoadStoreOp", None),
+    ("pc_out_of_bounds", "PcOutOfBounds", None),
+    # Also covers "LoadSignExtend invalid shift amount".
+    ("load_sign_extend_shift", "invalid shift amount", None),
+    ("opcode_225", "Failed to convert usize 225", None),
+    ("opcode_225", "opcode LessThanOpcode", None),
+    ("opcode_225", "opcode BranchEq", None),
+    ("opcode_225", "opcode BranchLe", None),
+    ("other_worker_panic", None, "worker panic"),
+    ("other_worker_panic", "run_backend_once", None),
+)
+
+
 def classify_backend_error(be: str | None) -> str:
     if be is None:
         return "null"
-    s = str(be)
-    if "timed out" in s.lower() or "worker killed" in s.lower():
-        return "timeout"
-    if "FailedWithExitCode(2)" in s:
-        return "failed_exit2"
-    if "Memory access out of bounds" in s:
-        return "memory_out_of_bounds"
-    if "unaligned memory" in s.lower() or "STOREW" in s or ("LOAD" in s and "unaligned" in s.lower()):
-        return "unaligned_memory"
-    if "index out of bounds" in s.lower() or "the len is 0" in s.lower():
-        return "index_out_of_bounds"
-    if "Invalid LoadStoreOp" in s:
-        return "invalid_loadstore_op"
-    if "PcOutOfBounds" in s:
-        return "pc_out_of_bounds"
-    if "LoadSignExtend invalid shift amount" in s or "invalid shift amount" in s:
-        return "load_sign_extend_shift"
-    if "Failed to convert usize 225" in s or "opcode LessThanOpcode" in s or "opcode BranchEq" in s or "opcode BranchLe" in s:
-        return "opcode_225"
-    if "worker panic" in s.lower() or "run_backend_once" in s:
-        return "other_worker_panic"
+    return _classify_backend_error_str(str(be))
+
+
+# Backend errors repeat a lot across a campaign (the same timeout or panic message), so
+# each distinct string is scanned against the rules once.
+@lru_cache(maxsize=1 << 14)
+def _classify_backend_error_str(s: str) -> str:
+    # Lowercased once, not once per case-insensitive rule.
+    sl = s.lower()
+    for category, needle, lower_needle in _BACKEND_ERROR_RULES:
+        if (needle is None or needle in s) and (lower_needle is None or lower_needle in sl):
+            return category
     return "other"
 
 
@@ -99,7 +143,10 @@ def is_code_as_data_mismatch(obj: dict) -> bool:
     """Code-as-data read mismatch: mismatch + mem/auipc/effective_ptr_zero etc. (BUG_REPORTS)."""
     if obj.get("metadata", {}).get("kind") != "mismatch":
         return False
-    sig = (obj.get("bucket_hits_sig") or "")
+    return _is_code_as_data_sig(obj.get("bucket_hits_sig") or "")
+
+
+def _is_code_as_data_sig(sig: str) -> bool:
     return (
         "openvm.auipc.seen" in sig
         or "openvm.mem.effective_ptr_zero" in sig
@@ -117,18 +164,46 @@ def classify_line(obj: dict) -> tuple[str, str]:
     Returns (pattern_id, human_label).
     human_label is a short name for summary; extra labels (regzero, code_as_data_mismatch) are applied when applicable.
     """
-    kind = obj.get("metadata", {}).get("kind", "?")
-    timed_out = obj.get("timed_out", False)
-    be = obj.get("backend_error")
+    return classify_fields(
+        obj.get("metadata", {}).get("kind", "?"),
+        obj.get("timed_out", False),
+        obj.get("backend_error"),
+        obj.get("bucket_hits_sig", "") or "",
+        has_regzero_hit(obj) or mismatch_includes_x0(obj),
+    )
+
+
+def classify_fields(
+    kind: str, timed_out: bool, be: str | None, sig: str, regzero: bool
+) -> tuple[str, str]:
+    """classify_line on the only fields it reads; `regzero` is the read/write regzero test."""
     be_cat = classify_backend_error(be)
-    bucket = bucket_category(obj.get("bucket_hits_sig", "") or "")
+    bucket = bucket_category(sig)
+    code_as_data = kind == "mismatch" and be_cat == "null" and _is_code_as_data_sig(sig)
+
+    # Well-formed records (str kind, bool timed_out) are looked up in _LABEL_TABLE.
+    entry = None
+    if type(kind) is str and type(timed_out) is bool:
+        entry = _LABEL_TABLE.get((kind, timed_out, be_cat, bucket, code_as_data))
+    pid, label = entry or _pattern_label(kind, timed_out, be_cat, bucket, code_as_data)
 
+    # Override: read/write regzero takes precedence for labeling
+    if regzero:
+        label = "regzero"
+
+    return pid, label
+
+
+def _pattern_label(
+    kind: str, timed_out: bool, be_cat: str, bucket: str, code_as_data: bool
+) -> tuple[str, str]:
+    """(pattern_id, label) before the regzero override."""
     pid = pattern_id(kind, timed_out, be_cat, bucket)
 
     if kind == "exception" and timed_out and be_cat == "timeout":
         label = "timeout"
     elif kind == "mismatch" and be_cat == "null":
-        if is_code_as_data_mismatch(obj):
+        if code_as_data:
             label = "code_as_data_mismatch"
         else:
             label = "mismatch"
@@ -148,29 +223,349 @@ def classify_line(obj: dict) -> tuple[str, str]:
         label = "load_sign_extend_shift"
     else:
         label = pid.replace("|", "_")
+    return pid, label
 
-    # Override: read/write regzero takes precedence for labeling
-    if has_regzero_hit(obj) or mismatch_includes_x0(obj):
-        label = "regzero"
 
-    return pid, label
+# _pattern_label of every key a beak-fuzz record can produce, computed at import;
+# other kinds (e.g. a missing one, "?") go through _pattern_label itself.
+_LABEL_TABLE: dict[tuple[str, bool, str, str, bool], tuple[str, str]] = {
+    key: _pattern_label(*key)
+    for key in product(
+        ("exception", "mismatch"),
+        (False, True),
+        ("null", "other", *dict.fromkeys(rule[0] for rule in _BACKEND_ERROR_RULES)),
+        ("empty", "has_more"),
+        (False, True),
+    )
+}
+
+
+# A bug record exactly as beak-fuzz serializes BugRecord: compact, fields in struct
+# order. The head pins the top-level scalar fields up to the bucket_hits array; the
+# values after it are decoded in place, except the instruction words, which are only
+# checked. Tokens are strict JSON, so a line accepted here is one json.loads accepts.
+# Unrolled ("normal* (special normal*)*") so a run of plain characters is one step.
+_JSON_STR = (
+    rb'"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*"'
+)
+_JSON_UINT = rb"(?:0|[1-9][0-9]*)"
+_BUG_RECORD_HEAD_RE = re.compile(
+    rb'\{"zkvm_commit":' + _JSON_STR + rb',"rng_seed":' + _JSON_UINT + rb','
+    rb'"timeout_ms":' + _JSON_UINT + rb','
+    rb'"timed_out":(true|false),"bucket_hits_sig":(' + _JSON_STR + rb'),'
+    rb'"signal_sig":' + _JSON_STR + rb',"micro_op_count":' + _JSON_UINT + rb','
+    rb'"backend_error":(null|' + _JSON_STR + rb'),"oracle_error":(?:null|' + _JSON_STR + rb'),'
+    rb'"bucket_hits":\['
+)
+_UINT_ARRAY_RE = re.compile(rb"\[(?:" + _JSON_UINT + rb"(?:," + _JSON_UINT + rb")*)?\]")
+_RECORD_TAIL_RE = re.compile(r"\}[ \t\n\r]*")
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _json_string(token: bytes) -> str:
+    """Decode a JSON string token (quotes included) the head regex accepted."""
+    if b"\\" in token:
+        return _JSON_DECODER.decode(token.decode())
+    return token[1:-1].decode()
+
+
+def _is_uint_array(raw: bytes) -> bool:
+    """True if raw is a compact JSON array of unsigned integers (the instruction words)."""
+    # Byte-level checks first: a regex over thousands of digits is the slow part.
+    if (
+        raw.translate(None, b"0123456789,") != b"[]"
+        or not (raw.startswith(b"[") and raw.endswith(b"]"))
+        or b",," in raw
+        or raw.startswith(b"[,")
+        or raw.endswith(b",]")
+    ):
+        return False
+    # Leading zeros are invalid JSON, but a word that is exactly 0 is rare anyway.
+    if b"[0" in raw or b",0" in raw:
+        return _UINT_ARRAY_RE.fullmatch(raw) is not None
+    return True
+
+
+def extract_fields(line: bytes) -> tuple[str, bool, str | None, str, bool] | None:
+    """
+    classify_fields arguments read from a raw line, or None when the line is not a
+    bug record in beak-fuzz's own layout and must be parsed instead. Regzero goes
+    through has_regzero_hit on the decoded hits, so a bucket_id nested in a hit's
+    details (or in metadata) is not a hit.
+    """
+    # ASCII keeps byte and str offsets equal; serde output of the fuzzer is ASCII.
+    head = _BUG_RECORD_HEAD_RE.match(line) if line.isascii() else None
+    if head is None:
+        return None
+    text = line.decode("ascii")
+    try:
+        bucket_hits, pos = _JSON_DECODER.raw_decode(text, head.end() - 1)
+        if not text.startswith(',"mismatch_regs":', pos):
+            return None
+        mismatch_regs, pos = _JSON_DECODER.raw_decode(text, pos + len(',"mismatch_regs":'))
+        if not text.startswith(',"instructions":[', pos):
+            return None
+        start = pos + len(',"instructions":')
+        pos = text.find("]", start) + 1
+        if not pos or not _is_uint_array(line[start:pos]):
+            return None
+        if not text.startswith(',"metadata":', pos):
+            return None
+        metadata, pos = _JSON_DECODER.raw_decode(text, pos + len(',"metadata":'))
+        if not _RECORD_TAIL_RE.fullmatch(text, pos):
+            return None
+        obj = {"bucket_hits": bucket_hits, "mismatch_regs": mismatch_regs}
+        kind = metadata.get("kind", "?")
+        regzero = has_regzero_hit(obj) or mismatch_includes_x0(obj)
+    except (ValueError, AttributeError, TypeError, LookupError):
+        # Not JSON, or a shape classify_line trips over too: let the parse path decide.
+        return None
+    be = None if head.group(3) == b"null" else _json_string(head.group(3))
+    return kind, head.group(1) == b"true", be, _json_string(head.group(2)), regzero
+
+
+def _classify_simdjson(doc: simdjson.Object) -> tuple[str, str] | None:
+    """
+    classify_line of a simdjson document, reading only the fields it needs; None if
+    one of them is not of the type a bug record has (it would not classify the same
+    as a parsed dict, e.g. by str() of a non-string backend_error). simdjson keeps
+    the first of duplicate keys, json the last; BugRecord lines have none.
+    """
+    metadata = doc.get("metadata", {})
+    if type(metadata) is not simdjson.Object and metadata != {}:
+        return None
+    kind = metadata.get("kind", "?")
+    timed_out = doc.get("timed_out", False)
+    be = doc.get("backend_error")
+    sig = doc.get("bucket_hits_sig", "") or ""
+    if (
+        type(kind) is not str
+        or type(timed_out) is not bool
+        or (be is not None and type(be) is not str)
+        or type(sig) is not str
+    ):
+        return None
+    return classify_fields(
+        kind, timed_out, be, sig, has_regzero_hit(doc) or mismatch_includes_x0(doc)
+    )
+
+
+# Shorter records decode about as fast with json.loads as with extract_fields.
+_EXTRACT_FIELDS_MIN_BYTES = 2048
+
+
+# First bytes of a line json.loads/orjson.loads can parse: whitespace or the start of a
+# value (json.loads also takes NaN and Infinity). Any other line is a parse error.
+_JSON_FIRST_BYTES = frozenset(bytes([b]) for b in b' \t\r\n{["-0123456789tfnNI')
+
+
+def classify_raw(line: bytes) -> tuple[str, str]:
+    """(pattern_id, label) of a raw line; unparsable lines are _parse_error."""
+    # Garbage (a truncated write, a log line) is settled without running the parser
+    # and raising an exception.
+    if line[:1] not in _JSON_FIRST_BYTES:
+        return "parse_error", "_parse_error"
+    # Whatever simdjson rejects or leaves undecided goes to _json_loads, which decides
+    # what is an error.
+    if _simdjson_parser is not None:
+        try:
+            doc = _simdjson_parser.parse(line)
+        except (ValueError, RuntimeError):
+            doc = None
+        if type(doc) is simdjson.Object:
+            result = _classify_simdjson(doc)
+            if result is not None:
+                return result
+    # orjson parses a whole record about as fast as the field scan, so the scan only
+    # stands in for the stdlib parser, and only where it skips enough instruction words.
+    elif orjson is None and len(line) >= _EXTRACT_FIELDS_MIN_BYTES:
+        fields = extract_fields(line)
+        if fields is not None:
+            return classify_fields(*fields)
+    try:
+        obj = _json_loads(line)
+    except json.JSONDecodeError:
+        return "parse_error", "_parse_error"
+    return classify_line(obj)
+
+
+# Below this size a summary stays in-process; worker start-up would cost more than it saves.
+_PARALLEL_SUMMARY_MIN_BYTES = 8 << 20
+
+
+def _line_aligned_bounds(path: Path, parts: int) -> list[int]:
+    """Offsets splitting `path` into about `parts` byte ranges that start on a line."""
+    size = path.stat().st_size
+    bounds = [0]
+    with open(path, "rb") as f:
+        for k in range(1, parts):
+            f.seek(max(size * k // parts - 1, 0))
+            f.readline()
+            if f.tell() > bounds[-1]:
+                bounds.append(f.tell())
+    if size > bounds[-1]:
+        bounds.append(size)
+    return bounds
+
+
+def _summarize_range(path: Path, start: int, end: int) -> Counter[str]:
+    """run_summary of the lines in [start, end)."""
+    counts: Counter[str] = Counter()
+    if start >= end:
+        return counts
+    # The range is carved into lines straight from a read-only mapping, so no reader
+    # has to seek into it or track where it stops.
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        find = mm.find
+        pos = start
+        while pos < end:
+            nl = find(b"\n", pos, end) + 1 or end
+            line = mm[pos:nl]
+            pos = nl
+            if line.isspace():
+                continue
+            counts[classify_raw(line)[1]] += 1
+    return counts
 
 
-def run_summary(path: Path) -> dict[str, list[tuple[int, str]]]:
-    """Return pattern_label -> [(line_no, pattern_id), ...]."""
-    by_label: dict[str, list[tuple[int, str]]] = defaultdict(list)
-    with open(path) as f:
-        for i, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
+def is_excluded(line: bytes, exclude: set[str]) -> bool:
+    """True if a (non-blank) raw line's label or pattern_id is in `exclude`."""
+    # Also exclude by pattern_id if user passes id-like strings
+    pid, label = classify_raw(line)
+    return label in exclude or pid in exclude
+
+
+def run_summary(path: Path) -> Counter[str]:
+    """Return pattern_label -> number of lines."""
+    size = path.stat().st_size
+    workers = os.cpu_count() or 1
+    if size < _PARALLEL_SUMMARY_MIN_BYTES or workers < 2:
+        return _summarize_range(path, 0, size)
+
+    # Lines are independent, so line-aligned byte ranges are counted on all cores.
+    bounds = _line_aligned_bounds(path, workers)
+    counts: Counter[str] = Counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(
+            _summarize_range, [path] * (len(bounds) - 1), bounds[:-1], bounds[1:]
+        ):
+            counts.update(part)
+    return counts
+
+
+_WRITE_BLOCK = 1 << 16
+_MERGE_BLOCK = 1 << 20
+
+
+def _filter_range(
+    path: Path,
+    start: int,
+    end: int,
+    exclude: set[str],
+    lines_only: bool,
+    first_line: int,
+    out: BinaryIO,
+) -> int:
+    """
+    Write the kept lines in [start, end) of `path` to `out`; returns how many were
+    written. With `lines_only`, their line numbers are written instead, counting
+    the line at `start` as `first_line`.
+    """
+    # Each line is classified and written (or dropped) as it is read. Kept lines are
+    # gathered into one buffer and written in blocks of _WRITE_BLOCK bytes.
+    kept = 0
+    buf = bytearray()
+    with open(path, "rb") as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), start, end - start, os.POSIX_FADV_SEQUENTIAL)
+        f.seek(start)
+        pos = start
+        for i, line in enumerate(f, first_line):
+            if pos >= end:
+                break
+            pos += len(line)
+            # Tests blank lines without allocating a stripped copy of every line.
+            if line.isspace():
+                if not lines_only:
+                    buf += line
+                    kept += 1
+                continue
+            if is_excluded(line, exclude):
                 continue
-            try:
-                obj = json.loads(line)
-                pid, label = classify_line(obj)
-                by_label[label].append((i, pid))
-            except json.JSONDecodeError:
-                by_label["_parse_error"].append((i, "parse_error"))
-    return dict(by_label)
+            if lines_only:
+                buf += b"%d\n" % i
+            else:
+                buf += line
+            kept += 1
+            if len(buf) >= _WRITE_BLOCK:
+                out.write(buf)
+                buf.clear()
+    out.write(buf)
+    return kept
+
+
+def _filter_shard(
+    path: Path,
+    start: int,
+    end: int,
+    exclude: set[str],
+    lines_only: bool,
+    first_line: int,
+    shard: Path,
+) -> int:
+    """_filter_range into the file `shard` (a worker process's output)."""
+    with open(shard, "wb") as out:
+        return _filter_range(path, start, end, exclude, lines_only, first_line, out)
+
+
+def _count_lines(path: Path, bounds: list[int]) -> list[int]:
+    """Number of the first line in each range of `bounds` (1-based)."""
+    first_lines = [1]
+    with open(path, "rb") as f:
+        for start, end in zip(bounds[:-2], bounds[1:-1]):
+            f.seek(start)
+            n = 0
+            while start < end:
+                block = f.read(min(_MERGE_BLOCK, end - start))
+                n += block.count(b"\n")
+                start += len(block)
+            first_lines.append(first_lines[-1] + n)
+    return first_lines
+
+
+def run_filter(
+    path: Path, exclude: set[str], lines_only: bool, out: BinaryIO, shards: int = 1
+) -> int:
+    """Write the lines of `path` not in `exclude` to `out`; returns how many were written."""
+    size = path.stat().st_size
+    bounds = _line_aligned_bounds(path, shards) if shards > 1 else [0, size]
+    n = len(bounds) - 1
+    if n < 2:
+        return _filter_range(path, 0, size, exclude, lines_only, 1, out)
+
+    # Line-aligned byte ranges are filtered into shard files by worker processes, then
+    # concatenated in order.
+    first_lines = _count_lines(path, bounds) if lines_only else [1] * n
+    with tempfile.TemporaryDirectory(prefix="filter_bugs_") as tmp:
+        shard_paths = [Path(tmp) / f"shard{k}" for k in range(n)]
+        with ProcessPoolExecutor(max_workers=n) as executor:
+            kept = sum(
+                executor.map(
+                    _filter_shard,
+                    [path] * n,
+                    bounds[:-1],
+                    bounds[1:],
+                    [exclude] * n,
+                    [lines_only] * n,
+                    first_lines,
+                    shard_paths,
+                )
+            )
+        out.flush()
+        for shard in shard_paths:
+            with open(shard, "rb") as f:
+                shutil.copyfileobj(f, out, _MERGE_BLOCK)
+    return kept
 
 
 def main() -> None:
@@ -202,19 +597,24 @@ def main() -> None:
         action="store_true",
         help="Output only line numbers of remaining lines (one per line).",
     )
+    ap.add_argument(
+        "--parallel-shards",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Filter N line-aligned shards of the input in N processes (default: 1).",
+    )
     args = ap.parse_args()
 
     if not args.input.exists():
         print(f"Error: file not found: {args.input}", file=sys.stderr)
         sys.exit(1)
 
-    by_label = run_summary(args.input)
-
     if args.summary:
+        counts = run_summary(args.input)
         print("Pattern summary (use these names with --exclude):\n")
-        for label in sorted(by_label.keys(), key=lambda L: (-len(by_label[L]), L)):
-            count = len(by_label[label])
-            print(f"  {count:6d}  {label}")
+        for label in sorted(counts.keys(), key=lambda L: (-counts[L], L)):
+            print(f"  {counts[label]:6d}  {label}")
         print("\nDefault uninteresting (--default-exclude):", ", ".join(DEFAULT_UNINTERESTING))
         return
 
@@ -225,39 +625,15 @@ def main() -> None:
     else:
         print("Error: use --default-exclude, --exclude PATTERNS, or --summary", file=sys.stderr)
         sys.exit(1)
-    # Also exclude by pattern_id if user passes id-like strings
-    lines_to_skip: set[int] = set()
-    for label, entries in by_label.items():
-        if label in exclude_set:
-            for (ln, _) in entries:
-                lines_to_skip.add(ln)
-        else:
-            for (ln, pid) in entries:
-                if pid in exclude_set:
-                    lines_to_skip.add(ln)
 
-    out = open(args.output, "w") if args.output else sys.stdout
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
     try:
-        with open(args.input) as f:
-            for i, line in enumerate(f, 1):
-                line_stripped = line.strip()
-                if not line_stripped:
-                    if not args.lines_only:
-                        out.write(line)
-                    continue
-                if i in lines_to_skip:
-                    continue
-                if args.lines_only:
-                    out.write(f"{i}\n")
-                else:
-                    out.write(line)
+        kept = run_filter(args.input, exclude_set, args.lines_only, out, args.parallel_shards)
     finally:
         if args.output:
             out.close()
 
     if args.output and not args.lines_only:
-        with open(args.output) as o:
-            kept = sum(1 for _ in o)
         print(f"Wrote {kept} lines to {args.output}", file=sys.stderr)
 
 